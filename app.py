@@ -1,32 +1,43 @@
+import os
+import time
 import streamlit as st
 import pandas as pd
-from utils.io import load_data
-from utils.prep import make_tables
-from sections import intro, overview, deep_dives, conclusions
+from utils.io import load_data, load_department_data
+from utils.prep import AGE_CLASSES
+from core import perf
+from utils import refresh, warmup
+from sections import PAGES, performance
 
 st.set_page_config(page_title="Data Storytelling Dashboard", layout="wide")
 
-# --- 1. Load and Prepare Data (Cached) ---
-@st.cache_data(show_spinner="Loading data...")
-def get_data():
-    """Loads and preprocesses the data."""
-    df_raw = load_data()
-    tables = make_tables(df_raw.copy()) 
-    return df_raw, tables  
+# --- 0. Performance instrumentation (sidebar panel or DASHBOARD_PERF_EXPORT) ---
+show_perf = st.session_state.get("show_perf", False)
+if show_perf or perf.EXPORT_PATH:
+    perf.start_rerun(allocations=show_perf, payloads=show_perf)
 
-df_raw, tables = get_data()
+# --- 1. Load and Prepare Data (shared store, hot-swapped by the drop-folder watcher) ---
+@st.cache_resource(show_spinner="Loading data...")
+def get_store():
+    """Loads and preprocesses the data once per process and starts watching the drop folder."""
+    store = refresh.open_store(load_data, load_department_data)
+    refresh.start_watcher(store)
+    return store
+
+with perf.span("get_data"):
+    try:
+        store = get_store()
+    except ValueError as e:
+        # Data with error violations is not loaded (same rules as the refresh watcher)
+        st.error(f"Failed to prepare data: {e}")
+        st.stop()
+    # One snapshot per rerun: a refresh landing mid-rerun is picked up by the next one
+    snapshot = store.current()
+    df_raw, tables = snapshot.df_raw, snapshot.tables
 # ---------- menu 
 
 # --- 2. Sidebar / Filters ---
 with st.sidebar:
     
-    PAGES = {
-        "Introduction": intro,
-        "Dashboard Overview": overview,
-        "Regional Deep Dive": deep_dives,
-        "Conclusions": conclusions
-    }
-    
     st.header("Navigation")
     selection = st.radio("Go to", list(PAGES.keys()))
     page = PAGES[selection]
@@ -38,10 +49,29 @@ with st.sidebar:
     st.session_state.regions = st.multiselect(
         "Select Regions",
         all_regions,
-        default = [region for region in all_regions if region in ['Grand Est', 'Île-de-France', 'Bretagne']]
+        default = warmup.default_regions(all_regions)
 
     )
 
+    # Drill down from the selected regions to their departments when the file is available
+    st.session_state.level = "region"
+    if not tables["department"].empty:
+        granularity = st.radio("Granularity", ["Region", "Department"], horizontal=True)
+        st.session_state.level = granularity.lower()
+        if st.session_state.level == "department":
+            dep = tables["department"]
+            all_departments = sorted(dep.loc[dep["region_name"].isin(st.session_state.regions), "dep_name"].unique())
+            st.session_state.departments = st.multiselect(
+                "Select Departments",
+                all_departments,
+                default=all_departments[:3]
+            )
+
+    # Age classes are queried from the partitioned store, at region level
+    st.session_state.age = 0
+    if tables.get("age") is not None and st.session_state.level == "region":
+        st.session_state.age = st.selectbox("Age class", list(AGE_CLASSES), format_func=AGE_CLASSES.get)
+
     # Convert to Python native datetime.date
     all_dates = sorted(pd.to_datetime(tables["full"]['jour'].dropna().unique()))
     min_date = all_dates[0].date()
@@ -59,7 +89,32 @@ with st.sidebar:
     # Store in session state if needed globally
     st.session_state.selected_date = selected_date
 
+    st.session_state.show_forecast = st.checkbox(
+        "Show 14-day forecast",
+        help="Overlay damped Holt forecasts and 95% intervals on the time series charts."
+    )
+
+    # --- Data version ---
+    st.caption(f"Data: {os.path.basename(snapshot.source)}, loaded {time.strftime('%d/%m/%Y %H:%M', time.localtime(snapshot.loaded_at))}")
+    if st.session_state.get("data_version", snapshot.version) != snapshot.version:
+        st.toast("New data loaded.")
+    st.session_state.data_version = snapshot.version
+    if store.last_error:
+        st.warning(store.last_error)
+
+    st.checkbox("Performance", key="show_perf", help="Show timings, allocations and cache hits of this rerun.")
+
+if perf.current() is not None:
+    perf.current().page = selection
 
     
 # --- 3. Display Selected Page ---
-page.write(df_raw, tables)
\ No newline at end of file
+try:
+    with perf.span(f"section.{page.__name__.split('.')[-1]}"):
+        page.write(df_raw, tables)
+finally:
+    recorder = perf.finish_rerun()
+
+if show_perf and recorder is not None:
+    with st.sidebar:
+        performance.write_panel(recorder, store.warmup)
@@ -0,0 +1,285 @@
+# multi-session load simulator: throughput, latency percentiles, contention, memory
+"""
+Run N concurrent simulated sessions against app.py (Streamlit's AppTest on
+the synthetic dataset), each making random sidebar interactions, and report
+how throughput, rerun latency, cache contention and resident memory evolve
+as the number of sessions grows:
+
+    python -m bench.load_sim --sessions 1,2,4,8 --reruns 20
+    python -m bench.load_sim --sessions 4 --mode process
+
+Thread mode runs every session in one process sharing its caches, like a
+single Streamlit replica. AppTest swaps a process-wide Runtime on every run
+and cannot be used from several threads, so each thread session gets its own
+script context and session state. Each rerun gets its snapshot from the shared
+store like app.py does: the first one of each session goes through the same
+st.cache_resource as app.get_store, so sessions starting together wait on one
+load. The rerun then sets the sidebar values in the session state (the
+sidebar widgets themselves are not rendered) and runs the real page of
+sections.PAGES, including its widgets, charts and their serialization. Process mode runs full AppTest reruns of app.py, one
+session per process, so caches are not shared: it approximates one session
+per replica.
+"""
+import argparse
+import datetime
+import importlib
+import json
+import os
+import random
+import resource
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import streamlit as st
+from streamlit.runtime.fragment import MemoryFragmentStorage
+from streamlit.runtime.memory_uploaded_file_manager import MemoryUploadedFileManager
+from streamlit.runtime.pages_manager import PagesManager
+from streamlit.runtime.scriptrunner_utils.script_run_context import ScriptRunContext, add_script_run_ctx
+from streamlit.runtime.state import SafeSessionState, SessionState
+from streamlit.testing.v1 import AppTest
+
+from bench import synthetic
+from core.cache import cache_stats, clear_caches
+from sections import PAGES
+from utils import warmup
+
+
+def _rss_bytes():
+    """Current resident memory of this process (Linux), falling back to the peak RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # ru_maxrss is in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _switch_page(at, rng, dates):
+    radio = at.sidebar.radio[0]
+    radio.set_value(rng.choice(radio.options))
+
+
+def _pick_regions(at, rng, dates):
+    multiselect = at.sidebar.multiselect[0]
+    multiselect.set_value(rng.sample(multiselect.options, rng.randint(1, 5)))
+
+
+def _pick_date(at, rng, dates):
+    first_day, last_day = dates
+    at.sidebar.slider[0].set_value(first_day + datetime.timedelta(days=rng.randint(0, (last_day - first_day).days)))
+
+
+def _pick_deep_dive_region(at, rng, dates):
+    if at.main.selectbox:
+        selectbox = at.main.selectbox[0]
+        selectbox.set_value(rng.choice(selectbox.options))
+
+
+ACTIONS = [_switch_page, _pick_regions, _pick_date, _pick_deep_dive_region]
+
+
+def simulate_apptest_session(seed, reruns, data_path=None):
+    """
+    Run one AppTest session: an initial load, then `reruns` random interactions.
+    Returns (rerun latencies in seconds, number of reruns that raised).
+    """
+    # Process workers start without the app imported; the first session points it at the data
+    if data_path and os.environ.get("DASHBOARD_DATA_PATH") != data_path:
+        synthetic.use_data(data_path)
+    rng = random.Random(seed)
+    at = AppTest.from_file("app.py", default_timeout=300)
+    at.run()
+    # The slider defaults to the last day; the synthetic data starts at START_DATE
+    dates = (datetime.date.fromisoformat(synthetic.START_DATE), at.sidebar.slider[0].value)
+
+    latencies = []
+    errors = 0
+    for _ in range(reruns):
+        rng.choice(ACTIONS)(at, rng, dates)
+        start = time.perf_counter()
+        at.run()
+        latencies.append(time.perf_counter() - start)
+        errors += bool(at.exception)
+    return latencies, errors
+
+
+def _script_context():
+    """
+    Attach a fresh ScriptRunContext (own session state, no Runtime) to the
+    current thread, so the section pages run in it as in a Streamlit session.
+    Returns (context, list collecting the messages sent to the browser).
+    """
+    messages = []
+    ctx = ScriptRunContext(
+        session_id=f"load-sim-{threading.get_ident()}",
+        _enqueue=messages.append,
+        query_string="",
+        session_state=SafeSessionState(SessionState(), lambda: None),
+        uploaded_file_mgr=MemoryUploadedFileManager("/_stcore/upload_file"),
+        main_script_path="app.py",
+        user_info={},
+        fragment_storage=MemoryFragmentStorage(),
+        pages_manager=PagesManager("app.py"),
+    )
+    add_script_run_ctx(threading.current_thread(), ctx)
+    return ctx, messages
+
+
+@st.cache_resource(show_spinner=False)
+def get_store():
+    """app.get_store without the drop-folder watcher: one shared store per level."""
+    # Imported here: core.io reads DASHBOARD_DATA_PATH, which main() sets first
+    from utils.io import load_data, load_department_data
+    from utils import refresh
+    return refresh.open_store(load_data, load_department_data)
+
+
+def simulate_page_session(seed, reruns, get_store):
+    """
+    Run one in-process session of `reruns` random interactions: each rerun
+    reads the current snapshot of get_store() (the first one may load it),
+    sets the sidebar values in the session state, as app.py does, and runs the
+    selected page of sections.PAGES.
+    Returns (rerun latencies in seconds, number of reruns that raised).
+    """
+    rng = random.Random(seed)
+    ctx, messages = _script_context()
+    # The first rerun loads or waits for the shared store; it is timed below with the rest
+    start = time.perf_counter()
+    tables = get_store().current().tables
+    load_s = time.perf_counter() - start
+    df = tables["full"]
+    all_regions = sorted(r for r in df["region_name"].dropna().unique() if r)
+    all_dates = sorted(df["jour"].dt.date.unique())
+
+    page = next(iter(PAGES))
+    state = ctx.session_state
+    state["regions"] = warmup.default_regions(all_regions)
+    state["selected_date"] = all_dates[-1]
+    state["level"] = "region"
+    state["age"] = 0
+    state["show_forecast"] = False
+
+    latencies = []
+    errors = 0
+    for i in range(reruns):
+        # A new rerun: widgets of the previous one can be set again
+        ctx.reset()
+        messages.clear()
+        action = rng.randrange(4)
+        if action == 0:
+            page = rng.choice(list(PAGES))
+        elif action == 1:
+            state["regions"] = rng.sample(all_regions, rng.randint(1, 5))
+        elif action == 2:
+            state["selected_date"] = rng.choice(all_dates)
+        else:
+            state["deep_dive_region"] = rng.choice(all_regions)
+
+        start = time.perf_counter()
+        try:
+            # One snapshot per rerun, as in app.py
+            snapshot = get_store().current()
+            PAGES[page].write(snapshot.df_raw, snapshot.tables)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start + (load_s if i == 0 else 0.0))
+        state.on_script_finished(ctx.widget_ids_this_run)
+    return latencies, errors
+
+
+def run_level(n_sessions, reruns, mode, data_path, seed=0):
+    """
+    Run n_sessions concurrent sessions from cold caches and return a report dict.
+    """
+    clear_caches()
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    stats_before = cache_stats()
+
+    if mode == "thread":
+        # Sessions share one store, loaded by the first of them (the caches cleared above)
+        executor_cls = ThreadPoolExecutor
+        session, shared = simulate_page_session, get_store
+    else:
+        executor_cls = ProcessPoolExecutor
+        # Resolve through the module so workers can unpickle it when run with -m
+        session, shared = importlib.import_module("bench.load_sim").simulate_apptest_session, data_path
+
+    start = time.perf_counter()
+    with executor_cls(max_workers=n_sessions) as executor:
+        futures = [
+            executor.submit(session, seed * 1000 + i, reruns, shared)
+            for i in range(n_sessions)
+        ]
+        results = [f.result() for f in futures]
+    wall = time.perf_counter() - start
+
+    latencies = np.concatenate([np.asarray(r[0]) for r in results])
+    report = {
+        "sessions": n_sessions,
+        "mode": mode,
+        "reruns": int(latencies.size),
+        "errors": sum(r[1] for r in results),
+        "wall_s": wall,
+        "throughput_rps": latencies.size / wall,
+        "p50_s": float(np.percentile(latencies, 50)),
+        "p95_s": float(np.percentile(latencies, 95)),
+        "p99_s": float(np.percentile(latencies, 99)),
+        "rss_bytes": _rss_bytes(),
+    }
+
+    # Cache counters only see this process, so they are meaningful in thread mode
+    if mode == "thread":
+        stats_after = cache_stats()
+        hits = sum(s["hits"] - stats_before[n]["hits"] for n, s in stats_after.items())
+        misses = sum(s["misses"] - stats_before[n]["misses"] for n, s in stats_after.items())
+        report["cache_hit_rate"] = hits / (hits + misses) if hits + misses else 0.0
+        report["cache_lock_wait_s"] = sum(
+            s["lock_wait_s"] - stats_before[n]["lock_wait_s"] for n, s in stats_after.items()
+        )
+        report["cache_resident_bytes"] = sum(s["resident_bytes"] for s in stats_after.values())
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard sessions.")
+    parser.add_argument("--sessions", default="1,2,4,8", help="comma-separated session counts")
+    parser.add_argument("--reruns", type=int, default=20, help="interactions per session")
+    parser.add_argument("--mode", choices=["thread", "process"], default="thread")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default="bench/data")
+    parser.add_argument("--out", help="write the reports to this JSON file")
+    args = parser.parse_args(argv)
+
+    # Before the first session imports the app, so its readers default to the synthetic file
+    data_path = synthetic.use_data(synthetic.write(args.data_dir, "reg", args.years))
+
+    # Untimed session so module imports are not charged to the first level
+    simulate_apptest_session(args.seed, 1)
+
+    reports = []
+    print(f"{'sessions':>8s} {'reruns/s':>9s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} "
+          f"{'hit rate':>8s} {'lock ms':>8s} {'RSS MB':>8s} {'errors':>6s}")
+    for n in [int(s) for s in args.sessions.split(",")]:
+        report = run_level(n, args.reruns, args.mode, data_path, args.seed)
+        reports.append(report)
+        print(
+            f"{n:8d} {report['throughput_rps']:9.2f} {report['p50_s'] * 1000:8.0f} "
+            f"{report['p95_s'] * 1000:8.0f} {report['p99_s'] * 1000:8.0f} "
+            f"{report.get('cache_hit_rate', float('nan')):8.2f} "
+            f"{report.get('cache_lock_wait_s', float('nan')) * 1000:8.2f} "
+            f"{report['rss_bytes'] / 1024 ** 2:8.0f} {report['errors']:6d}"
+        )
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
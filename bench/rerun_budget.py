@@ -0,0 +1,216 @@
+# headless rerun-latency and memory budgets for every page
+"""
+Drive app.py headlessly with Streamlit's AppTest against a synthetic dataset,
+switch through every page and change the sidebar regions, the date slider
+and the deep-dive region selectbox. Each interaction's rerun latency and
+peak memory are checked against bench/budgets.json; the command exits with
+status 1 when any of them goes over budget. Latency budgets are stored as
+multiples of a fixed pandas workload timed in the same run, so they carry
+over to faster or slower machines:
+
+    python -m bench.rerun_budget
+    python -m bench.rerun_budget --update   # re-record budgets on this machine
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from bench import synthetic
+from utils import warmup
+from core.cache import clear_caches
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), "budgets.json")
+
+DEEP_DIVE = "Regional Deep Dive"
+
+# Absolute slack added to budgets, so that very fast pages do not fail on timer noise
+SLACK = {"latency_s": 0.25, "peak_bytes": 8 * 1024 ** 2}
+
+# Allowed factor over the stored budgets
+TOLERANCE = 2.0
+
+
+def calibrate(repeat=5):
+    """
+    Median time in seconds of a fixed pandas workload (rolling means per
+    region and JSON serialization of a synthetic year), which does not use
+    the app code: the unit of the latency budgets on this machine.
+    """
+    df = synthetic.generate("reg", years=1)
+    rates = ["tx_indic_7J_hosp", "tx_indic_7J_SC", "tx_indic_7J_DC"]
+
+    def workload():
+        rolled = df.groupby(["reg", "PourAvec"])[rates].rolling(7).mean()
+        rolled.reset_index().to_json(orient="records")
+
+    workload()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        workload()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def _interactions(at):
+    """
+    Yield (page, interaction, action) for the scripted session. Each action
+    changes one widget on the AppTest and is followed by a timed rerun.
+    """
+    pages = at.sidebar.radio[0].options
+    for page in pages:
+        yield page, "switch_page", lambda at, page=page: at.sidebar.radio[0].set_value(page)
+        yield page, "rerun", lambda at: at
+
+        def add_region(at):
+            multiselect = at.sidebar.multiselect[0]
+            extra = [r for r in multiselect.options if r not in multiselect.value][:1]
+            return multiselect.set_value(list(multiselect.value) + extra)
+
+        def change_date(at):
+            slider = at.sidebar.slider[0]
+            return slider.set_value(slider.value - datetime.timedelta(days=90))
+
+        yield page, "regions", add_region
+        yield page, "date", change_date
+
+        if page == DEEP_DIVE:
+            def change_region(at):
+                selectbox = at.main.selectbox[0]
+                return selectbox.set_value(selectbox.options[-1])
+
+            yield page, "deep_dive_region", change_region
+
+
+def _run_session(trace_memory):
+    """
+    Run the scripted session once from cold caches and return
+    {"page/interaction": seconds or peak bytes}.
+    """
+    clear_caches()
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+    at = AppTest.from_file("app.py", default_timeout=300)
+    measures = {}
+
+    def timed_run(key, action):
+        action(at)
+        gc.collect()
+        if trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(f"{key} raised: {at.exception[0].message}")
+        # Peak memory is measured above what was already resident before the rerun
+        measures[key] = tracemalloc.get_traced_memory()[1] - baseline if trace_memory else elapsed
+
+    timed_run("startup", lambda at: at)
+    # The background warm-up would otherwise be measured as part of the next reruns
+    warmup.wait()
+    for page, interaction, action in _interactions(at):
+        timed_run(f"{page}/{interaction}", action)
+    return measures
+
+
+def measure(repeat=3):
+    """
+    Return {"page/interaction": {"latency_s", "peak_bytes"}}: median latency over
+    `repeat` sessions, and peak memory from one extra traced session (tracing
+    is kept out of the timed sessions).
+    """
+    # Untimed first session: pays for module imports, which are not per-rerun costs
+    _run_session(trace_memory=False)
+    latencies = [_run_session(trace_memory=False) for _ in range(repeat)]
+
+    tracemalloc.start()
+    try:
+        peaks = _run_session(trace_memory=True)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        key: {
+            "latency_s": statistics.median(run[key] for run in latencies),
+            "peak_bytes": peaks[key],
+        }
+        for key in latencies[0]
+    }
+
+
+def to_budgets(measures, unit_s, headroom):
+    """Budgets of measures with headroom: latency in multiples of unit_s (see calibrate()), peak memory in bytes."""
+    return {
+        key: {"latency": m["latency_s"] / unit_s * headroom, "peak_bytes": int(m["peak_bytes"] * headroom)}
+        for key, m in measures.items()
+    }
+
+
+def check(measures, budgets, unit_s, tolerance):
+    """
+    Return the list of budget violations, as readable strings. Latency budgets
+    are scaled by unit_s, the calibration time of this machine.
+    """
+    failures = []
+    for key, measured in measures.items():
+        budget = budgets.get(key)
+        if budget is None:
+            failures.append(f"{key}: no budget recorded (run with --update)")
+            continue
+        limits = {"latency_s": budget["latency"] * unit_s, "peak_bytes": budget["peak_bytes"]}
+        for metric, allowed in limits.items():
+            limit = max(allowed * tolerance, allowed + SLACK[metric])
+            if measured[metric] > limit:
+                failures.append(f"{key}: {metric} {measured[metric]:.3g} > {limit:.3g} (budget {allowed:.3g})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check per-page rerun latency and memory against stored budgets.")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed factor over the stored budget")
+    parser.add_argument("--headroom", type=float, default=1.2, help="factor applied to measurements on --update")
+    parser.add_argument("--update", action="store_true", help="record the measurements as new budgets")
+    parser.add_argument("--budgets", default=BUDGETS_PATH)
+    parser.add_argument("--data-dir", default="bench/data")
+    args = parser.parse_args(argv)
+
+    synthetic.use_data(synthetic.write(args.data_dir, "reg", args.years))
+    unit_s = calibrate()
+    measures = measure(args.repeat)
+    # Averaged with a calibration after the sessions, in case the load of the machine changed meanwhile
+    unit_s = (unit_s + calibrate()) / 2
+    print(f"{'calibration':45s} {unit_s * 1000:8.1f} ms")
+
+    for key, m in measures.items():
+        print(f"{key:45s} {m['latency_s'] * 1000:8.1f} ms {m['peak_bytes'] / 1024 ** 2:8.1f} MB")
+
+    if args.update:
+        with open(args.budgets, "w") as f:
+            json.dump(to_budgets(measures, unit_s, args.headroom), f, indent=2)
+        print(f"Budgets written to {args.budgets}")
+        return 0
+
+    with open(args.budgets) as f:
+        budgets = json.load(f)
+    failures = check(measures, budgets, unit_s, args.tolerance)
+    for failure in failures:
+        print(f"OVER BUDGET {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+# benchmark suite: timings, memory peaks and spec sizes of the data pipeline
+"""
+Time and memory-profile the data pipeline and every chart builder against a
+synthetic dataset, and store the results as JSON so runs can be compared
+across commits:
+
+    python -m bench.run --years 3 --out bench/results/HEAD.json
+    python -m bench.run --years 3 --compare bench/results/main.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import altair as alt
+import pandas as pd
+
+from bench import synthetic
+from utils.io import load_data, load_department_data
+from utils.prep import get_age_data, get_filtered_data, make_tables
+from core import store
+from core.artifacts import build_age_store
+from utils import viz
+from utils.correlation import lag_correlations, lead_lag_table
+from utils.forecast import forecast_table
+from utils.rolling import rolling_stats
+
+DEFAULT_REGIONS = ['Grand Est', 'Île-de-France', 'Bretagne']
+
+
+def _measure(func, repeat):
+    """
+    Run func `repeat` times for timing, then once more under tracemalloc
+    (kept separate so tracing overhead does not skew the timings).
+    Returns (stats dict, last result).
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = {
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "max_s": max(times),
+        "peak_alloc_bytes": peak,
+    }
+    return stats, result
+
+
+def _spec_bytes(chart):
+    return len(chart.to_json(indent=None).encode())
+
+
+def run(path, repeat=5, dep_path=None, age_path=None, store_dir="bench/data/store"):
+    """
+    Benchmark every stage on the file at path (plus the department-level
+    file at dep_path and the age-class store built from age_path, if given)
+    and return {case: stats}.
+    """
+    results = {}
+
+    stats, df_raw = _measure(lambda: load_data(nrows=None, path=path), repeat)
+    stats["rows"] = len(df_raw)
+    results["load_data"] = stats
+
+    df_dep = load_department_data(path=dep_path) if dep_path else None
+    stats, tables = _measure(lambda: make_tables(df_raw.copy(), df_dep), repeat)
+    results["make_tables"] = stats
+    df = tables["full"]
+
+    regions = [r for r in DEFAULT_REGIONS if r in set(df["region_name"])]
+    selected_date = df["jour"].max().date()
+
+    # Cold: cache cleared before every call; warm: served from the LRU
+    def cold_filter():
+        get_filtered_data.cache_clear()
+        return get_filtered_data(df, regions, selected_date)
+
+    results["get_filtered_data_cold"], (filtered_df, _) = _measure(cold_filter, repeat)
+    results["get_filtered_data_warm"], _ = _measure(lambda: get_filtered_data(df, regions, selected_date), repeat)
+
+    if not tables["department"].empty:
+        dep = tables["department"]
+        departments = sorted(dep.loc[dep["region_name"].isin(regions), "dep_name"].unique())[:3]
+        results["get_filtered_data_department"], _ = _measure(
+            lambda: get_filtered_data(dep, departments, selected_date, key="dep_name"), repeat
+        )
+
+    if age_path:
+        def build_store():
+            shutil.rmtree(store_dir, ignore_errors=True)
+            return build_age_store(age_path, store_dir)
+
+        results["age_store_build"], store_path = _measure(build_store, 1)
+
+        # Region + age class + date range: only the matching partitions are read
+        def age_query():
+            get_age_data.cache_clear()
+            return get_age_data(store_path, store.version(store_path), regions, 39, selected_date,
+                                (selected_date - datetime.timedelta(days=90), selected_date))
+
+        results["get_age_data_cold"], _ = _measure(age_query, repeat)
+
+    def cold(func, *args, **kwargs):
+        # Cached engines and chart builders are timed from a cleared cache
+        def call():
+            func.cache_clear()
+            return func(*args, **kwargs)
+        return call
+
+    results["waves"], _ = _measure(cold(viz.waves, df), repeat)
+
+    results["forecast_table"], forecast = _measure(cold(forecast_table, df), repeat)
+    results["lag_correlations"], lags = _measure(cold(lag_correlations, df), repeat)
+    results["rolling_stats"], state = _measure(cold(rolling_stats, df), repeat)
+    df_lags = lead_lag_table(lags, "tx_indic_7J_DC", "tx_indic_7J_hosp")
+
+    charts = {
+        "line_chart": cold(viz.line_chart, filtered_df, regions, title="New Hospitalizations by Region Over Time"),
+        "bar_chart_death": cold(viz.bar_chart_death, filtered_df, selected_date),
+        "ranked_bar_chart": cold(viz.ranked_bar_chart, df),
+        "map_chart": cold(viz.map_chart, tables["rollups"]["region"]),
+        "map_chart2": cold(viz.map_chart2, tables["rollups"]["region"]),
+        "combo_chart": cold(viz.combo_chart, df, regions[0], forecast=forecast),
+        "waves_chart": lambda: cold(viz.waves, df)()[1],
+        "death_rate_during_peaks": cold(viz.death_rate_during_peaks, df),
+        "hospitalization_growth_rate_chart": cold(viz.hospitalization_growth_rate_chart, filtered_df, regions),
+        "lag_heatmap": cold(viz.lag_heatmap, df_lags, "Deaths", "Hospitalizations"),
+        # Not cached: rebuilt on every rerun of the Alerts page
+        "alerts_chart": lambda: viz.alerts_chart(state.alerts_frame().assign(indicator_name=lambda d: d["indicator"])),
+    }
+    for name, build in charts.items():
+        stats, chart = _measure(build, repeat)
+        serialize_stats, _ = _measure(lambda: _spec_bytes(chart), max(1, repeat // 2))
+        stats["serialize_median_s"] = serialize_stats["median_s"]
+        stats["spec_bytes"] = _spec_bytes(chart)
+        results[f"viz.{name}"] = stats
+
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline):
+    """
+    Print the median time, peak memory and spec size ratios of current vs baseline.
+    """
+    print(f"{'case':45s} {'time':>10s} {'ratio':>7s} {'peak MB':>9s} {'ratio':>7s} {'spec KB':>9s}")
+    for name, stats in current["results"].items():
+        base = baseline["results"].get(name)
+        time_ratio = stats["median_s"] / base["median_s"] if base and base["median_s"] else float("nan")
+        mem_ratio = stats["peak_alloc_bytes"] / base["peak_alloc_bytes"] if base and base["peak_alloc_bytes"] else float("nan")
+        spec = f"{stats['spec_bytes'] / 1024:9.1f}" if "spec_bytes" in stats else f"{'':9s}"
+        print(
+            f"{name:45s} {stats['median_s'] * 1000:8.1f}ms {time_ratio:7.2f} "
+            f"{stats['peak_alloc_bytes'] / 1024 ** 2:9.1f} {mem_ratio:7.2f} {spec}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard data pipeline and charts.")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--age", action="store_true", help="also build and query the age-class store")
+    parser.add_argument("--departments", action="store_true", help="also load the department-level file")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--data-dir", default="bench/data")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    # Large inline datasets are expected here, do not let Altair refuse them
+    alt.data_transformers.disable_max_rows()
+
+    path = synthetic.write(args.data_dir, "reg", args.years)
+    age_path = synthetic.write(args.data_dir, "reg", args.years, age=True) if args.age else None
+    dep_path = synthetic.write(args.data_dir, "dep", args.years) if args.departments else None
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "altair": alt.__version__,
+            "dataset": os.path.basename(path),
+            "years": args.years,
+            "age": args.age,
+            "departments": args.departments,
+            "repeat": args.repeat,
+        },
+        "results": run(path, args.repeat, dep_path, age_path, os.path.join(args.data_dir, "store")),
+    }
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    else:
+        compare(results, {"results": {}})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# synthetic covid-hosp-txad-* files at configurable scale
+"""
+Generate CSV files in the exact schema of the data.gouv.fr
+"covid-hosp-txad" exports, so the dashboard can be benchmarked without the
+real dataset:
+
+    python -m bench.synthetic --level reg --years 3
+    python -m bench.synthetic --level dep --years 10 --age
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from core.prep import AGE_CLASSES as AGE_LABELS, DEPARTMENTS as DEPARTMENT_INFO, REGION_NAMES
+
+REGIONS = list(REGION_NAMES)
+
+DEPARTMENTS = list(DEPARTMENT_INFO)
+
+# cl_age90 classes as published by data.gouv.fr (0 = all ages)
+AGE_CLASSES = list(AGE_LABELS)
+
+START_DATE = "2020-03-19"
+
+
+def _wave_profile(n_days, n_series, rng):
+    """
+    Build an (n_series, n_days) matrix of non-negative epidemic-like curves:
+    a sum of yearly gaussian waves with per-series amplitude and phase, plus noise.
+    """
+    t = np.arange(n_days)
+    n_waves = max(1, int(round(n_days / 365 * 2.5)))
+    centers = np.linspace(15, n_days - 30, n_waves)
+    widths = rng.uniform(12, 35, size=n_waves)
+    heights = rng.uniform(2, 12, size=n_waves)
+
+    base = (heights[:, None] * np.exp(-0.5 * ((t[None, :] - centers[:, None]) / widths[:, None]) ** 2)).sum(axis=0)
+
+    scale = rng.uniform(0.4, 1.6, size=(n_series, 1))
+    shift = rng.integers(-10, 10, size=n_series)
+    curves = np.stack([np.roll(base, s) for s in shift]) * scale
+    curves += rng.normal(0, 0.15, size=curves.shape)
+    return np.clip(curves, 0, None)
+
+
+def generate(level="reg", years=3, age=False, seed=0):
+    """
+    Return a DataFrame in the covid-hosp-txad schema.
+
+    Args:
+        level (str): "reg" for the 18 regions or "dep" for the 101 departments.
+        years (int): number of years of daily data (3 to 10 in practice).
+        age (bool): add the cl_age90 dimension (about 10x more rows).
+        seed (int): random seed, so the same parameters always give the same file.
+    """
+    rng = np.random.default_rng(seed)
+    entities = REGIONS if level == "reg" else DEPARTMENTS
+    ages = AGE_CLASSES if age else [None]
+    n_days = int(years * 365)
+    days = pd.date_range(START_DATE, periods=n_days, freq="D").strftime("%Y-%m-%d")
+
+    # One curve per entity / age class / PourAvec combination
+    keys = [(e, a, p) for e in entities for a in ages for p in (0, 1, 2)]
+    hosp = _wave_profile(n_days, len(keys), rng)
+    sc = hosp * rng.uniform(0.1, 0.3, size=(len(keys), 1))
+    dc = np.roll(hosp, 10, axis=1) * rng.uniform(0.05, 0.15, size=(len(keys), 1))
+    prev_hosp = hosp * rng.uniform(4, 8, size=(len(keys), 1))
+    prev_sc = sc * rng.uniform(3, 6, size=(len(keys), 1))
+
+    n = len(keys)
+    data = {level: np.repeat([k[0] for k in keys], n_days)}
+    if age:
+        data["cl_age90"] = np.repeat([k[1] for k in keys], n_days)
+    pour_avec = np.repeat([k[2] for k in keys], n_days)
+    data["jour"] = np.tile(days, n)
+    data["PourAvec"] = pour_avec
+
+    # Deaths are only published for PourAvec = 0, like the real export
+    dc = dc.ravel()
+    dc[pour_avec != 0] = np.nan
+    data["tx_indic_7J_DC"] = dc
+    data["tx_indic_7J_hosp"] = hosp.ravel()
+    data["tx_indic_7J_SC"] = sc.ravel()
+    data["tx_prev_hosp"] = prev_hosp.ravel()
+    data["tx_prev_SC"] = prev_sc.ravel()
+
+    df = pd.DataFrame(data)
+    rate_cols = ["tx_indic_7J_DC", "tx_indic_7J_hosp", "tx_indic_7J_SC", "tx_prev_hosp", "tx_prev_SC"]
+    df[rate_cols] = df[rate_cols].round(2)
+    return df.sort_values(["jour", level], kind="stable").reset_index(drop=True)
+
+
+def file_name(level="reg", years=3, age=False):
+    kind = f"age-{level}" if age else level
+    return f"covid-hosp-txad-{kind}-synthetic-{years}y.csv"
+
+
+def write(out_dir="bench/data", level="reg", years=3, age=False, seed=0, overwrite=False):
+    """
+    Write a synthetic file to out_dir (reusing an existing one unless overwrite)
+    and return its path.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, file_name(level, years, age))
+    if overwrite or not os.path.exists(path):
+        generate(level, years, age, seed).to_csv(path, sep=";", index=False)
+    return path
+
+
+def use_data(path):
+    """
+    Point the app run in this process (AppTest) at path. core.io reads
+    DASHBOARD_DATA_PATH when it is imported, so this must be called before
+    anything imports it: assigning core.io.DATA_PATH afterwards would not
+    reach the defaults already bound from it.
+    """
+    if "core.io" in sys.modules:
+        raise RuntimeError("core.io is already imported, call use_data() before importing the app modules")
+    os.environ["DASHBOARD_DATA_PATH"] = path
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic covid-hosp-txad files.")
+    parser.add_argument("--level", choices=["reg", "dep"], default="reg")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--age", action="store_true", help="add the cl_age90 dimension")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench/data")
+    args = parser.parse_args(argv)
+
+    path = write(args.out, args.level, args.years, args.age, args.seed, overwrite=True)
+    print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# batch CLI: precompute the dashboard artifacts without Streamlit
+"""
+Precompute every table, rollup, KPI and wave table into Parquet artifacts
+that app.py loads at startup instead of preparing the CSV itself:
+
+    python -m core --out artifacts --workers 4
+"""
+import argparse
+
+from core.artifacts import ARTIFACTS_DIR, precompute
+from core.io import AGE_DATA_PATH, DATA_PATH, DEP_DATA_PATH, ROW_LIMIT
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the dashboard artifacts.")
+    parser.add_argument("--data", default=DATA_PATH, help="regional covid-hosp-txad export")
+    parser.add_argument("--dep-data", default=DEP_DATA_PATH, help="department-level export (optional)")
+    parser.add_argument("--age-data", default=AGE_DATA_PATH, help="age-class export (optional)")
+    parser.add_argument("--out", default=ARTIFACTS_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--all-rows", action="store_true", help="read the whole file instead of the app's row limit")
+    args = parser.parse_args(argv)
+
+    manifest = precompute(args.data, args.dep_data, args.out, nrows=None if args.all_rows else ROW_LIMIT, workers=args.workers,
+                          age_path=args.age_data)
+    print(f"{len(manifest['files'])} artifacts written to {args.out} in {manifest['build_s']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# precomputed tables, KPIs and waves written to Parquet for the app to load at startup
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from core import store
+from core.io import AGE_DATA_PATH, DATA_PATH, DEP_DATA_PATH, ROW_LIMIT, read_age_data, read_data, read_department_data
+from core.prep import INDICATORS, LEVELS, age_feature_engineering, make_tables
+from core.validation import validate
+from core.waves import detect_waves
+
+ARTIFACTS_DIR = os.environ.get('DASHBOARD_ARTIFACTS_DIR', 'artifacts')
+MANIFEST = 'manifest.json'
+
+# Bumped whenever the layout or the content of the artifacts changes
+FORMAT_VERSION = 2
+
+# Age-class store versions kept under out_dir/age: the newest, and the one the
+# sessions of the previous snapshot may still be reading
+AGE_VERSIONS_KEPT = 2
+
+TABLES = ('full', 'department', 'timeseries', 'by_region')
+WAVE_TABLES = ('national', 'waves', 'peaks')
+
+
+def source_signature(path, nrows):
+    """Identify the source file, so stale artifacts are not loaded for a newer export."""
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'nrows': nrows}
+
+
+def _department_signature(path):
+    return source_signature(path, None) if os.path.exists(path) else None
+
+
+def entity_kpis(level, entity, df_entity):
+    """
+    KPIs of one entity for every day of its history: the indicators on a
+    continuous daily index (missing days forward-filled, as the pages show the
+    latest known value) and their change over 7 days.
+    """
+    df_entity = df_entity.set_index('jour')[INDICATORS].sort_index()
+    df_entity = df_entity.reindex(pd.date_range(df_entity.index.min(), df_entity.index.max(), freq='D'))
+    observed = df_entity.notna().all(axis=1)
+    df_entity = df_entity.ffill()
+
+    kpis = df_entity.join(df_entity.diff(7).add_suffix('_change_7d'))
+    kpis['observed'] = observed
+    kpis.insert(0, 'entity', entity)
+    kpis.insert(0, 'level', level)
+    return kpis.rename_axis('jour').reset_index()
+
+
+def _kpi_jobs(tables):
+    """(level, entity, rows) for every entity of every level, plus the national series."""
+    for level, (table, key) in LEVELS.items():
+        df = tables[table]
+        if df.empty:
+            continue
+        for entity, df_entity in df.groupby(key):
+            yield level, entity, df_entity[['jour', *INDICATORS]]
+    yield 'national', 'France', tables['rollups']['national']
+
+
+def kpi_table(tables):
+    """KPIs of every entity (see entity_kpis) in one frame, computed in the calling thread."""
+    return pd.concat([entity_kpis(*job) for job in _kpi_jobs(tables)], ignore_index=True)
+
+
+def wave_tables(df):
+    """{name: table} of the waves detected on df (see core.waves.detect_waves)."""
+    return dict(zip(WAVE_TABLES, detect_waves(df)))
+
+
+def _prune_age_stores(root, keep=AGE_VERSIONS_KEPT):
+    """Delete all but the `keep` most recently published stores under root."""
+    def published(name):
+        manifest = os.path.join(root, name, store.MANIFEST)
+        return os.path.getmtime(manifest) if os.path.exists(manifest) else 0
+
+    names = sorted((n for n in os.listdir(root) if not n.startswith('.')), key=published, reverse=True)
+    for name in names[keep:]:
+        path = os.path.join(root, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+
+
+def build_age_store(age_path=AGE_DATA_PATH, out_dir=ARTIFACTS_DIR, chunksize=500_000):
+    """
+    Write the age-class file, chunk by chunk, into a partitioned store (see
+    core.store) of its own under out_dir/age, named after the version of the
+    file, unless that store already exists.
+
+    A published store is never rewritten: a new version is written to a
+    temporary directory and renamed into place, so sessions reading the
+    previous store (through the previous snapshot) are not affected.
+
+    Returns: the store path, or None when there is no age-class file.
+    """
+    if not os.path.exists(age_path):
+        return None
+    meta = {'source': source_signature(age_path, None)}
+    version = hashlib.blake2b(json.dumps(meta, sort_keys=True).encode(), digest_size=8).hexdigest()
+    root = os.path.join(out_dir, 'age')
+    path = os.path.join(root, version)
+    if store.is_store(path):
+        return path
+
+    tmp_path = os.path.join(root, f'.{version}.{os.getpid()}.{threading.get_ident()}.tmp')
+    chunks = (age_feature_engineering(chunk) for chunk in read_age_data(chunksize, age_path))
+    store.write_store(chunks, tmp_path, meta=meta)
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Published meanwhile by another process: theirs is the same version
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    _prune_age_stores(root)
+    return path
+
+
+def precompute(data_path=DATA_PATH, dep_path=DEP_DATA_PATH, out_dir=ARTIFACTS_DIR, nrows=ROW_LIMIT, workers=None,
+               age_path=AGE_DATA_PATH):
+    """
+    Build every table, rollup, KPI and wave table of the dashboard and write
+    them to out_dir. KPIs are computed per entity and waves in parallel, in a
+    process pool of `workers` processes. The age-class file, if any, goes to
+    the partitioned store out_dir/age.
+
+    Returns: the manifest dict.
+    """
+    start = time.perf_counter()
+    # Invalidate the previous artifacts first: files are overwritten in place
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    df_raw = read_data(nrows, data_path)
+    tables = make_tables(df_raw.copy(), read_department_data(path=dep_path))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        waves_future = pool.submit(detect_waves, tables['full'])
+        kpi_futures = [pool.submit(entity_kpis, *job) for job in _kpi_jobs(tables)]
+        kpis = pd.concat([f.result() for f in kpi_futures], ignore_index=True)
+        waves = dict(zip(WAVE_TABLES, waves_future.result()))
+
+    files = {}
+
+    def write(name, df):
+        path = os.path.join(out_dir, f'{name}.parquet')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_parquet(path, index=False)
+        files[name] = os.path.relpath(path, out_dir)
+
+    write('raw', df_raw)
+    for name in TABLES:
+        write(f'tables/{name}', tables[name])
+    for name, df in tables['rollups'].items():
+        write(f'rollups/{name}', df)
+    write('kpis', kpis)
+    for name, df in waves.items():
+        write(f'waves/{name}', df)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'source': source_signature(data_path, nrows),
+        'department_source': _department_signature(dep_path),
+        'age_store': build_age_store(age_path, out_dir) is not None,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'build_s': round(time.perf_counter() - start, 3),
+        'files': files,
+    }
+    # Written last, so an interrupted run never looks complete
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load(out_dir=ARTIFACTS_DIR, data_path=DATA_PATH, nrows=ROW_LIMIT, dep_path=DEP_DATA_PATH):
+    """
+    Load the artifacts of out_dir if they were built from the current data_path and dep_path.
+
+    Returns:
+        (df_raw, tables) with tables shaped like make_tables() (validation is
+        re-run, it is cheap) plus 'kpis' and 'waves', or None when the artifacts are missing or stale.
+        Raises ValueError when the data has error violations, like make_tables().
+    """
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('format_version') != FORMAT_VERSION:
+        return None
+    try:
+        if manifest['source'] != source_signature(data_path, nrows):
+            return None
+        if manifest['department_source'] != _department_signature(dep_path):
+            return None
+    except OSError:
+        return None
+
+    def read(name):
+        return pd.read_parquet(os.path.join(out_dir, manifest['files'][name]))
+
+    tables = {name: read(f'tables/{name}') for name in TABLES}
+    tables['rollups'] = {
+        name.split('/', 1)[1]: read(name) for name in manifest['files'] if name.startswith('rollups/')
+    }
+    tables['validation'] = validate(tables['full'])
+    tables['validation'].raise_for_errors()
+    tables['kpis'] = read('kpis')
+    tables['waves'] = {name: read(f'waves/{name}') for name in WAVE_TABLES}
+    tables['age'] = build_age_store(out_dir=out_dir)
+    return read('raw'), tables
@@ -0,0 +1,268 @@
+# bounded LRU cache for data functions, limited by a total byte budget
+import functools
+import hashlib
+import inspect
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Registry of every cached function, used by cache_stats()
+_CACHES = {}
+
+# Cache hits per thread: a Streamlit session reruns on its own thread, so
+# rerun spans count their own hits and not those of concurrent sessions
+_thread_hits = threading.local()
+
+# Memoized DataFrame fingerprints, keyed by id() and dropped when the frame is collected
+_FINGERPRINTS = {}
+_FINGERPRINTS_LOCK = threading.Lock()
+
+
+def _frame_fingerprint(obj):
+    """
+    Return a stable digest of a DataFrame or Series content.
+    The digest is memoized per object, so frames passed to cached functions
+    must not be mutated in place afterwards (the app never does).
+    """
+    key = id(obj)
+    with _FINGERPRINTS_LOCK:
+        entry = _FINGERPRINTS.get(key)
+        if entry is not None and entry[0]() is obj:
+            return entry[1]
+
+    hashed = pd.util.hash_pandas_object(obj, index=True).to_numpy()
+    digest = hashlib.blake2b(hashed.tobytes(), digest_size=16)
+    if isinstance(obj, pd.DataFrame):
+        digest.update(repr(list(obj.columns)).encode())
+    digest = digest.hexdigest()
+
+    with _FINGERPRINTS_LOCK:
+        _FINGERPRINTS[key] = (weakref.ref(obj), digest)
+    weakref.finalize(obj, _FINGERPRINTS.pop, key, None)
+    return digest
+
+
+def _freeze(value):
+    """Turn an argument into a hashable cache-key component."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return (type(value).__name__, _frame_fingerprint(value))
+    if isinstance(value, np.ndarray):
+        return ("ndarray", value.shape, hashlib.blake2b(value.tobytes(), digest_size=16).hexdigest())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def sizeof(value, _seen=None):
+    """
+    Estimate the resident size in bytes of a cached value.
+    DataFrames are measured with deep memory usage; containers are summed, and
+    so are the attributes of objects: the frames an Altair chart embeds (data,
+    layers, lookup data) and the arrays of engine states like RollingStats.
+    Every object reachable from value is counted once.
+    """
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(v, seen) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(v, seen) for v in value.values())
+    # Altair schema objects keep their properties in _kwds, other objects in __dict__
+    attributes = getattr(value, "_kwds", None)
+    if not isinstance(attributes, dict):
+        attributes = getattr(value, "__dict__", None)
+    if isinstance(attributes, dict):
+        return sys.getsizeof(value) + sizeof(attributes, seen)
+    return sys.getsizeof(value)
+
+
+class BoundedCache:
+    """
+    Thread-safe LRU store with a total byte budget and an optional entry limit.
+    Least recently used entries are evicted until the budget is respected.
+    """
+
+    def __init__(self, name, max_bytes, max_entries=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # key -> Event of the computation in progress, so concurrent misses compute once
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self.resident_bytes = 0
+        # Time spent waiting for the lock, to measure contention between sessions
+        self.lock_wait_s = 0.0
+
+    def _acquire(self):
+        start = time.perf_counter()
+        self._lock.acquire()
+        self.lock_wait_s += time.perf_counter() - start
+
+    def get(self, key):
+        self._acquire()
+        try:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                _thread_hits.count = getattr(_thread_hits, "count", 0) + 1
+                return True, self._entries[key][0]
+            self.misses += 1
+            return False, None
+        finally:
+            self._lock.release()
+
+    def claim(self, key):
+        """
+        Register the caller as computing key after a miss. Returns (event, leader):
+        the leader computes and calls release(); others wait on event. event is
+        None when the value was stored since the miss.
+        """
+        self._acquire()
+        try:
+            if key in self._entries:
+                return None, False
+            if key in self._inflight:
+                self.coalesced += 1
+                return self._inflight[key], False
+            event = self._inflight[key] = threading.Event()
+            return event, True
+        finally:
+            self._lock.release()
+
+    def release(self, key):
+        with self._lock:
+            event = self._inflight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def put(self, key, value):
+        size = sizeof(value)
+        self._acquire()
+        try:
+            if key in self._entries:
+                self.resident_bytes -= self._entries.pop(key)[1]
+            # Values larger than the whole budget are returned but never stored
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.resident_bytes += size
+            while self._entries and (
+                self.resident_bytes > self.max_bytes
+                or (self.max_entries is not None and len(self._entries) > self.max_entries)
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.resident_bytes -= evicted_size
+                self.evictions += 1
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.resident_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced,
+                "resident_bytes": self.resident_bytes,
+                "max_bytes": self.max_bytes,
+                "lock_wait_s": self.lock_wait_s,
+            }
+
+
+def bounded_cache(max_bytes=128 * 1024 ** 2, max_entries=None, name=None):
+    """
+    Decorator caching a data function in a process-wide LRU limited by max_bytes.
+    Unlike st.cache_data, cached values are returned as-is (not copied),
+    so callers must treat them as read-only. Concurrent calls with the same
+    arguments are computed once, the other callers wait for the result.
+
+    Args:
+        max_bytes (int): total byte budget for the values of this function.
+        max_entries (int): optional cap on the number of cached results.
+        name (str): key used in cache_stats(), defaults to module.qualname.
+    """
+    def decorator(func):
+        cache = BoundedCache(name or f"{func.__module__}.{func.__qualname__}", max_bytes, max_entries)
+        _CACHES[cache.name] = cache
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Positional, keyword and defaulted forms of the same call share one key
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = _freeze(bound.arguments)
+            found, value = cache.get(key)
+            if found:
+                return value
+
+            event, leader = cache.claim(key)
+            if not leader:
+                # Same call in progress in another thread (e.g. the warm-up): wait for it
+                if event is not None:
+                    event.wait()
+                found, value = cache.get(key)
+                if found:
+                    return value
+                # The other call failed or its value was too large to store
+                return func(*args, **kwargs)
+
+            try:
+                value = func(*args, **kwargs)
+                cache.put(key, value)
+            finally:
+                cache.release(key)
+            return value
+
+        wrapper.cache = cache
+        wrapper.cache_stats = cache.stats
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
+
+
+def cache_stats():
+    """Return hit rate, evictions and resident bytes for every cached function."""
+    return {name: cache.stats() for name, cache in _CACHES.items()}
+
+
+def thread_hits():
+    """Return the number of cache hits, over every cached function, on the calling thread."""
+    return getattr(_thread_hits, "count", 0)
+
+
+def clear_caches():
+    for cache in _CACHES.values():
+        cache.clear()
@@ -0,0 +1,45 @@
+# Streamlit-free readers of the data.gouv.fr exports; errors are raised, not displayed
+import os
+
+import pandas as pd
+
+# DASHBOARD_DATA_PATH lets benchmarks and headless tests point the app at another file
+DATA_PATH = os.environ.get('DASHBOARD_DATA_PATH', 'data/covid-hosp-txad-reg-2023-06-30-16h29.csv')
+DEP_DATA_PATH = os.environ.get('DASHBOARD_DEP_DATA_PATH', 'data/covid-hosp-txad-dep-2023-06-30-16h29.csv')
+# Same indicators broken down by age class (cl_age90), about 10x more rows
+AGE_DATA_PATH = os.environ.get('DASHBOARD_AGE_DATA_PATH', 'data/covid-hosp-txad-age-reg-2023-06-30-16h29.csv')
+
+# Rows read by the app by default
+ROW_LIMIT = 65180
+
+def read_data(nrows=ROW_LIMIT, path=None):
+    """
+    Read hospital COVID data from the specified CSV file.
+    - nrows: number of rows to read (None for all)
+    - path: path to the CSV file (defaults to DATA_PATH)
+    Returns: pandas DataFrame. Raises if the file cannot be read.
+    """
+    return pd.read_csv(path or DATA_PATH, nrows=nrows, sep=';')
+
+def read_department_data(nrows=None, path=None):
+    """
+    Read the optional department-level file (same indicators, 'dep' instead of 'reg').
+    - nrows: number of rows to read (None for all)
+    - path: path to the CSV file (defaults to DEP_DATA_PATH)
+    Returns: pandas DataFrame, empty when the file is not available. Raises if it cannot be read.
+    """
+    path = path or DEP_DATA_PATH
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    # Codes like '01' and '2A' must stay strings
+    return pd.read_csv(path, nrows=nrows, sep=';', dtype={'dep': str})
+
+def read_age_data(chunksize=500_000, path=None):
+    """
+    Read the age-class file in chunks of chunksize rows, so it never has to fit in memory at once.
+    Returns: an iterator of DataFrames, empty when the file is not available. Raises if it cannot be read.
+    """
+    path = path or AGE_DATA_PATH
+    if not os.path.exists(path):
+        return iter([])
+    return pd.read_csv(path, sep=';', chunksize=chunksize)
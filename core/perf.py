@@ -0,0 +1,259 @@
+# rerun instrumentation: timed spans, per-page latency history, metrics export
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+
+import numpy as np
+
+from core.cache import cache_stats, sizeof, thread_hits
+
+# Set DASHBOARD_PERF_EXPORT to a file path to record every rerun:
+# "*.prom" is rewritten with Prometheus text, anything else gets JSON lines
+EXPORT_PATH = os.environ.get("DASHBOARD_PERF_EXPORT")
+
+# Rerun latencies kept per page for the p50/p95 summaries
+HISTORY_SIZE = 500
+
+_local = threading.local()
+_history = defaultdict(lambda: deque(maxlen=HISTORY_SIZE))
+_span_totals = defaultdict(lambda: [0, 0.0])
+_lock = threading.Lock()
+
+# Reruns recording allocations, and whether tracemalloc was started here: tracing
+# slows down every thread of the process, so it stops with the last such rerun
+_tracing_reruns = 0
+_started_tracing = False
+
+
+class Recorder:
+    """
+    Collects the spans of a single rerun. Allocation tracking (tracemalloc)
+    and payload sizes are opt-in since both add overhead.
+    """
+
+    def __init__(self, page=None, allocations=False, payloads=False):
+        self.page = page
+        self.allocations = allocations
+        self.payloads = payloads
+        # Counted in _tracing_reruns until the rerun finishes
+        self.tracing = False
+        self.spans = []
+        self.depth = 0
+        # Highest traced memory seen so far by each open span, innermost last
+        self.open_peaks = []
+        self.start = time.perf_counter()
+        self.total_s = None
+
+
+def _payload_bytes(value):
+    """Serialized size for charts, deep memory size for frames and containers."""
+    if hasattr(value, "to_json") and hasattr(value, "mark"):
+        return len(value.to_json(indent=None).encode())
+    if isinstance(value, tuple):
+        return sum(_payload_bytes(v) for v in value)
+    return sizeof(value)
+
+
+def current():
+    """Return the recorder of the rerun running on this thread, if any."""
+    return getattr(_local, "recorder", None)
+
+
+def start_rerun(page=None, allocations=False, payloads=False):
+    """
+    Start recording spans for the rerun on this thread and return the recorder.
+    """
+    global _tracing_reruns, _started_tracing
+    # A rerun interrupted before finish_rerun() no longer needs tracing
+    _release_tracing(current())
+    if allocations:
+        with _lock:
+            _tracing_reruns += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _started_tracing = True
+    recorder = _local.recorder = Recorder(page, allocations, payloads)
+    recorder.tracing = allocations
+    return recorder
+
+
+def _release_tracing(recorder):
+    """Stop tracemalloc when the last rerun recording allocations ends (unless it was started elsewhere)."""
+    global _tracing_reruns, _started_tracing
+    if recorder is None or not recorder.tracing:
+        return
+    recorder.tracing = False
+    with _lock:
+        _tracing_reruns -= 1
+        if _tracing_reruns == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+def finish_rerun():
+    """
+    Close the current rerun, add its latency to the page history and export it.
+    Returns the finished recorder (or None if nothing was being recorded).
+    """
+    recorder = current()
+    if recorder is None:
+        return None
+    _local.recorder = None
+    recorder.total_s = time.perf_counter() - recorder.start
+    _release_tracing(recorder)
+
+    with _lock:
+        _history[recorder.page].append(recorder.total_s)
+        for span in recorder.spans:
+            totals = _span_totals[span["name"]]
+            totals[0] += 1
+            totals[1] += span["wall_s"]
+
+    if EXPORT_PATH:
+        export(recorder, EXPORT_PATH)
+    return recorder
+
+
+@contextlib.contextmanager
+def span(name):
+    """
+    Time a block of the current rerun. Does nothing when no rerun is recorded.
+    The yielded dict can receive a "result" key to have its payload measured.
+    """
+    recorder = current()
+    if recorder is None:
+        yield {}
+        return
+
+    record = {"name": name, "depth": recorder.depth}
+    hits_before = thread_hits()
+    if recorder.allocations:
+        # reset_peak() is process-wide: hand the peak so far to the enclosing span first
+        traced, peak = tracemalloc.get_traced_memory()
+        if recorder.open_peaks:
+            recorder.open_peaks[-1] = max(recorder.open_peaks[-1], peak)
+        tracemalloc.reset_peak()
+        alloc_before = traced
+        recorder.open_peaks.append(traced)
+    recorder.depth += 1
+    start = time.perf_counter()
+    record["start_s"] = start - recorder.start
+    try:
+        yield record
+    finally:
+        record["wall_s"] = time.perf_counter() - start
+        recorder.depth -= 1
+        record["cache_hits"] = thread_hits() - hits_before
+        if recorder.allocations:
+            peak = max(recorder.open_peaks.pop(), tracemalloc.get_traced_memory()[1])
+            if recorder.open_peaks:
+                recorder.open_peaks[-1] = max(recorder.open_peaks[-1], peak)
+            # Memory held at the span's high point over what was traced when it started
+            record["peak_alloc_bytes"] = peak - alloc_before
+        result = record.pop("result", None)
+        if recorder.payloads and result is not None:
+            record["payload_bytes"] = _payload_bytes(result)
+        recorder.spans.append(record)
+
+
+def timed(name=None):
+    """
+    Decorator recording each call of a function as a span of the current rerun.
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if current() is None:
+                return func(*args, **kwargs)
+            with span(span_name) as record:
+                result = func(*args, **kwargs)
+                record["result"] = result
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def latency_summary():
+    """Return {page: {count, p50_s, p95_s}} over the recorded rerun history."""
+    with _lock:
+        history = {page: list(values) for page, values in _history.items()}
+    return {
+        page: {
+            "count": len(values),
+            "p50_s": float(np.percentile(values, 50)),
+            "p95_s": float(np.percentile(values, 95)),
+        }
+        for page, values in history.items()
+        if values
+    }
+
+
+def _metric_family(name, kind, help_text, samples):
+    """HELP / TYPE lines of one metric family followed by its (labels, value) samples."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{{{labels}}} {value}" for labels, value in samples]
+    return lines
+
+
+def prometheus_text():
+    """Render rerun latencies, span totals and cache statistics in Prometheus text format."""
+    lines = [
+        "# HELP dashboard_rerun_seconds Rerun latency per page.",
+        "# TYPE dashboard_rerun_seconds summary",
+    ]
+    for page, summary in latency_summary().items():
+        lines.append(f'dashboard_rerun_seconds{{page="{page}",quantile="0.5"}} {summary["p50_s"]:.6f}')
+        lines.append(f'dashboard_rerun_seconds{{page="{page}",quantile="0.95"}} {summary["p95_s"]:.6f}')
+        lines.append(f'dashboard_rerun_seconds_count{{page="{page}"}} {summary["count"]}')
+
+    with _lock:
+        totals = dict(_span_totals)
+    lines += _metric_family(
+        "dashboard_span_seconds_total", "counter", "Cumulative wall time per instrumented span.",
+        [(f'span="{name}"', f"{wall:.6f}") for name, (count, wall) in totals.items()],
+    )
+    lines += _metric_family(
+        "dashboard_span_calls_total", "counter", "Calls per instrumented span.",
+        [(f'span="{name}"', count) for name, (count, wall) in totals.items()],
+    )
+
+    stats = cache_stats()
+    for metric, kind, key, help_text in [
+        ("dashboard_cache_hits_total", "counter", "hits", "Cache hits per cached function."),
+        ("dashboard_cache_misses_total", "counter", "misses", "Cache misses per cached function."),
+        ("dashboard_cache_evictions_total", "counter", "evictions", "Cache evictions per cached function."),
+        ("dashboard_cache_resident_bytes", "gauge", "resident_bytes", "Estimated bytes held per cached function."),
+    ]:
+        lines += _metric_family(metric, kind, help_text, [(f'function="{name}"', s[key]) for name, s in stats.items()])
+    return "\n".join(lines) + "\n"
+
+
+def export(recorder, path):
+    """
+    Export a finished rerun: append a JSON line, or rewrite the Prometheus
+    text file atomically when path ends with ".prom".
+    """
+    if path.endswith(".prom"):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(prometheus_text())
+        os.replace(tmp_path, path)
+        return
+
+    line = json.dumps({
+        "timestamp": time.time(),
+        "page": recorder.page,
+        "total_s": recorder.total_s,
+        "spans": recorder.spans,
+    })
+    with _lock, open(path, "a") as f:
+        f.write(line + "\n")
@@ -0,0 +1,178 @@
+# cleaning, normalization, feature engineering, rollups (no Streamlit: usable in workers and batch jobs)
+import numpy as np
+import pandas as pd 
+from core import query
+from core.perf import span
+from core.regions import DEPARTMENTS, REGION_NAMES
+from core.validation import validate
+
+# Name column of each level of the hierarchy, and the table holding its daily rows
+LEVELS = {
+    "region": ("full", "region_name"),
+    "department": ("department", "dep_name"),
+}
+
+INDICATORS = ['tx_indic_7J_hosp', 'tx_indic_7J_SC', 'tx_indic_7J_DC']
+
+# cl_age90 code -> label (the code is the upper bound of the class, 0 = all ages)
+AGE_CLASSES = {
+    0: 'All ages', 9: '0-9', 19: '10-19', 29: '20-29', 39: '30-39', 49: '40-49',
+    59: '50-59', 69: '60-69', 79: '70-79', 89: '80-89', 90: '90+',
+}
+
+def cleaning(df):
+    """
+    Clean the DataFrame by removing duplicates and missing values.
+    """
+    print('Missing values remaining:', df.isnull().sum().sum())
+    print('Duplicate rows remaining:', df.duplicated().sum())
+    # Remove duplicates
+    df = df.drop_duplicates()
+    
+    # Remove rows with missing values
+    df = df.dropna()
+    
+    # Convert date column to datetime format
+    df['jour'] = pd.to_datetime(df['jour'], format='%Y-%m-%d')
+    
+    # Verify no missing values and no duplicates remain
+    print('Missing values remaining:', df.isnull().sum().sum())
+    print('Duplicate rows remaining:', df.duplicated().sum())
+    return df
+
+def validate_data(df):
+    """
+    Run every validation rule (see core.validation.RULES) on df and return the
+    ValidationReport: all violations are counted, nothing stops at the first one.
+    """
+    return validate(df)
+
+
+def exploration(df):
+	print(df.info())
+	print(df.describe())
+
+#no normalization needed for this dataset 
+#because rates are already standardized (per 100,000 inhabitants)
+
+def feature_engineering(df):
+    # create a new column to add region names to the region codes
+    # Ensure region codes are int for mapping
+    df['reg'] = df['reg'].astype(int)
+    df['region_name'] = df['reg'].map(REGION_NAMES)
+
+    # Create a new column to calculate the growth rate of hospitalizations per week
+    # Use groupby to avoid cross-region calculation if needed
+    # Ensure 'jour' is a datetime column
+    df['jour'] = pd.to_datetime(df['jour'])
+
+    # Sort the DataFrame by region and date (important for accurate pct_change)
+    df = df.sort_values(['reg', 'jour'])
+
+    # Calculate the weekly growth rate of hospitalization rate (7-day difference)
+    df['hosp_growth_rate'] = df.groupby('reg')['tx_indic_7J_hosp'].pct_change(periods=7)
+
+    # Replace infinite values with NA (occurs when previous value is zero)
+    # (NaN rather than pd.NA keeps the column float64 instead of object)
+    df['hosp_growth_rate'] = df['hosp_growth_rate'].replace([float('inf'), -float('inf')], np.nan)
+
+
+    return df
+
+def department_feature_engineering(df):
+    """
+    Add department names and the parent region (code and name) to the
+    department-level file, so each row knows its place in the
+    department -> region -> national hierarchy.
+    """
+    df['dep'] = df['dep'].astype(str).str.zfill(2)
+    df = df[df['dep'].isin(DEPARTMENTS.keys())].copy()
+    df['dep_name'] = df['dep'].map({code: name for code, (name, _) in DEPARTMENTS.items()})
+    df['reg'] = df['dep'].map({code: reg for code, (_, reg) in DEPARTMENTS.items()})
+    df['region_name'] = df['reg'].map(REGION_NAMES)
+    df['jour'] = pd.to_datetime(df['jour'])
+    return df.sort_values(['dep', 'jour'])
+
+def age_feature_engineering(df):
+    """
+    Prepare one chunk of the age-class file for the columnar store: the same
+    cleaning as the regional file, plus region names. The weekly growth rate
+    needs whole series, so it is computed at query time on the selected rows.
+    """
+    df = cleaning(df)
+    df['reg'] = df['reg'].astype(int)
+    df['region_name'] = df['reg'].map(REGION_NAMES)
+    return df
+
+def make_rollups(df, df_dep):
+    """
+    Precompute the aggregates of every level of the hierarchy, once per dataset:
+    - national: daily mean of the regional rates
+    - region / department: mean rate per entity over the whole period (maps)
+    Rates are per 100,000 inhabitants, so means are unweighted, like in waves().
+    """
+    rollups = {
+        "national": query.aggregate(df, ['jour'], INDICATORS),
+        "region": query.aggregate(df, ['region_name'], INDICATORS),
+    }
+    if not df_dep.empty:
+        rollups["department"] = query.aggregate(df_dep, ['dep_name', 'region_name'], INDICATORS)
+    return rollups
+
+def make_tables(df, df_dep=None):
+    """
+    Prepare cleaned DataFrame and aggregated tables for the dashboard:
+    - full: cleaned & feature-engineered df
+    - department: cleaned department-level df (empty if not available)
+    - timeseries: hospitalization per day
+    - by_region: hospitalization per region
+    - rollups: national, region and department aggregates (see make_rollups)
+    - validation: ValidationReport of the feature-engineered df
+    Raises ValueError when df has error violations (see core.validation), like
+    the refresh watcher rejects such files.
+    """
+    # Step 1: Clean and feature engineer
+    with span("make_tables.cleaning"):
+        df_clean = cleaning(df)
+    with span("make_tables.feature_engineering"):
+        df_feature = feature_engineering(df_clean)
+    with span("make_tables.validate_data"):
+        validation = validate_data(df_feature)
+    validation.raise_for_errors()
+    df_validate = df_feature
+
+    with span("make_tables.departments"):
+        if df_dep is not None and not df_dep.empty:
+            df_department = department_feature_engineering(cleaning(df_dep))
+        else:
+            df_department = pd.DataFrame(columns=['dep', 'dep_name', 'reg', 'region_name', 'jour'] + INDICATORS)
+
+    with span("make_tables.aggregates"):
+        # Timeseries table
+        timeseries = df_validate.groupby('jour')['tx_indic_7J_hosp'].sum().reset_index()
+
+        # By region table
+        by_region = df_validate.groupby('region_name')['tx_indic_7J_hosp'].sum().reset_index()
+
+        rollups = make_rollups(df_validate, df_department)
+
+    # Return dictionary
+    return {
+        "full": df_validate,
+        "department": df_department,
+        "timeseries": timeseries,
+        "by_region": by_region,
+        "rollups": rollups,
+        "validation": validation
+    }
+
+def level_view(tables, level):
+    """
+    Return (daily DataFrame, name column) for a level of the hierarchy,
+    falling back to regions when department data is not loaded.
+    """
+    table, key = LEVELS.get(level, LEVELS["region"])
+    if tables[table].empty:
+        table, key = LEVELS["region"]
+    return tables[table], key
+
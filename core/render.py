@@ -0,0 +1,121 @@
+# offline rendering of Vega-Lite specs to standalone HTML / SVG / PNG files
+"""
+Runs in the worker processes of utils/export.py: a job is a plain Vega-Lite
+spec dict (data inlined), so workers import neither Altair nor Streamlit.
+
+SVG, PNG and self-contained HTML need vl-convert (pip install
+vl-convert-python), which bundles the Vega JavaScript and renders without a
+browser or network access. Without it, HTML pages load Vega from a CDN.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import vl_convert as vlc
+except ImportError:  # optional: only SVG / PNG / offline HTML need it
+    vlc = None
+
+FORMATS = ('html', 'svg', 'png', 'json')
+
+# Formats that cannot be produced without vl-convert
+NEEDS_VL_CONVERT = ('svg', 'png')
+
+# Same page as Altair's default HTML output (scripts from a CDN)
+CDN_HTML = """<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <title>{title}</title>
+  <script src="https://cdn.jsdelivr.net/npm/vega@5"></script>
+  <script src="https://cdn.jsdelivr.net/npm/vega-lite@5"></script>
+  <script src="https://cdn.jsdelivr.net/npm/vega-embed@6"></script>
+</head>
+<body>
+  <div id="vis"></div>
+  <script>vegaEmbed("#vis", {spec}, {{"mode": "vega-lite"}});</script>
+</body>
+</html>
+"""
+
+
+def backend():
+    """Return the name of the renderer in use: 'vl-convert' or 'cdn' (HTML and JSON only)."""
+    return "vl-convert" if vlc is not None else "cdn"
+
+
+def check_formats(formats):
+    """Raise ValueError for unknown formats, or formats that need the missing vl-convert."""
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown export formats {unknown}, expected some of {list(FORMATS)}")
+    missing = [f for f in formats if f in NEEDS_VL_CONVERT]
+    if missing and vlc is None:
+        raise ValueError(f"{', '.join(missing)} export needs vl-convert: pip install vl-convert-python")
+
+
+def inline_urls(spec, files):
+    """
+    Return spec with every {"url": ...} data source found in files (url -> local
+    path) replaced by its inlined values, so the chart renders offline.
+    GeoJSON sources read with format.property keep only that property.
+    """
+    if isinstance(spec, list):
+        return [inline_urls(item, files) for item in spec]
+    if not isinstance(spec, dict):
+        return spec
+    if spec.get('url') in files:
+        with open(files[spec['url']], encoding='utf-8') as f:
+            values = json.load(f)
+        prop = spec.get('format', {}).get('property')
+        if prop:
+            values = values[prop]
+        return {'values': values}
+    return {key: inline_urls(value, files) for key, value in spec.items()}
+
+
+def render(spec, name, out_dir, formats=('html',), scale=2):
+    """
+    Write spec as out_dir/name.<format> for every format and return the written paths.
+    PNG files are rendered at `scale` times the chart size.
+    """
+    paths = []
+    for fmt in formats:
+        path = os.path.join(out_dir, f"{name}.{fmt}")
+        if fmt == 'json':
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(spec, f)
+        elif fmt == 'html':
+            if vlc is not None:
+                html = vlc.vegalite_to_html(spec, bundle=True)
+            else:
+                html = CDN_HTML.format(title=name, spec=json.dumps(spec))
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(html)
+        elif fmt == 'svg':
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(vlc.vegalite_to_svg(spec))
+        elif fmt == 'png':
+            with open(path, 'wb') as f:
+                f.write(vlc.vegalite_to_png(spec, scale=scale))
+        paths.append(path)
+    return paths
+
+
+def _render_job(job):
+    name, spec, out_dir, formats, scale = job
+    return name, render(spec, name, out_dir, formats, scale)
+
+
+def render_all(specs, out_dir, formats=('html',), workers=None, scale=2):
+    """
+    Render {name: spec} to out_dir in a process pool of `workers` processes
+    (in-process when workers is 1). Returns {name: [paths]} in the order of specs.
+    """
+    check_formats(formats)
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(name, spec, out_dir, tuple(formats), scale) for name, spec in specs.items()]
+    if workers == 1 or len(jobs) <= 1:
+        return dict(map(_render_job, jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(_render_job, jobs))
@@ -0,0 +1,160 @@
+# partitioned columnar store (region x year) with per-file statistics for partition pruning
+"""
+Layout of a store directory:
+
+    manifest.json                      columns, and the statistics of every file
+    reg=11/year=2021/part-00000.parquet
+    reg=11/year=2022/part-00000.parquet
+    ...
+
+Each input chunk writes one file per (reg, year) partition, sorted by age
+class and date so that row-group statistics stay selective inside a file.
+prune() compares query filters with the manifest statistics and returns only
+the files that can hold matching rows.
+"""
+import datetime
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+MANIFEST = 'manifest.json'
+PARTITION_COLUMNS = ('reg', 'year')
+
+# Columns with at most this many distinct values per file also record the value set
+MAX_VALUE_SET = 32
+
+
+def _scalar(value):
+    """JSON-friendly scalar: dates as ISO strings, NumPy numbers as Python numbers."""
+    if isinstance(value, (pd.Timestamp, datetime.date)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def column_stats(df):
+    """min / max (and the value set of low-cardinality columns) of every column of df."""
+    stats = {}
+    for column in df.columns:
+        values = df[column].dropna()
+        if values.empty:
+            continue
+        entry = {'min': _scalar(values.min()), 'max': _scalar(values.max())}
+        unique = values.unique()
+        if len(unique) <= MAX_VALUE_SET:
+            entry['values'] = sorted(_scalar(v) for v in unique)
+        stats[column] = entry
+    return stats
+
+
+def write_store(chunks, path, row_group_size=16 * 1024, meta=None):
+    """
+    Write prepared frames (one or an iterable of chunks, each with reg and a
+    datetime jour column) into a store at path, and return the manifest.
+    Memory stays bounded by the chunk size. meta is saved as is in the manifest.
+    """
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+    os.makedirs(path, exist_ok=True)
+    manifest_path = os.path.join(path, MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    files, columns = [], None
+    for i, chunk in enumerate(chunks):
+        chunk = chunk.assign(year=chunk['jour'].dt.year)
+        sort_columns = [c for c in ('cl_age90', 'jour') if c in chunk.columns]
+        for (reg, year), part in chunk.groupby(list(PARTITION_COLUMNS), sort=True):
+            part = part.drop(columns=list(PARTITION_COLUMNS)).sort_values(sort_columns)
+            name = os.path.join(f'reg={reg}', f'year={year}', f'part-{i:05d}.parquet')
+            os.makedirs(os.path.join(path, os.path.dirname(name)), exist_ok=True)
+            pq.write_table(pa.Table.from_pandas(part, preserve_index=False), os.path.join(path, name), row_group_size=row_group_size)
+
+            stats = column_stats(part)
+            stats['reg'] = {'min': _scalar(reg), 'max': _scalar(reg), 'values': [_scalar(reg)]}
+            stats['year'] = {'min': _scalar(year), 'max': _scalar(year), 'values': [_scalar(year)]}
+            files.append({'path': name, 'rows': len(part), 'stats': stats})
+            columns = columns or list(part.columns) + list(PARTITION_COLUMNS)
+
+    manifest = {'columns': columns or [], 'files': files, 'meta': meta}
+    # Written last, so a partial store is never read
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def is_store(source):
+    return isinstance(source, str) and os.path.isfile(os.path.join(source, MANIFEST))
+
+
+def version(path):
+    """
+    Version of the store at path, changed by every write_store(): cache keys
+    built on a store include it, so a rewritten store is never served stale.
+    """
+    return os.stat(os.path.join(path, MANIFEST)).st_mtime_ns
+
+
+_manifests = {}
+
+
+def read_manifest(path):
+    """Parsed manifest of the store at path, re-read only when the file changes."""
+    manifest_path = os.path.join(path, MANIFEST)
+    mtime = os.stat(manifest_path).st_mtime_ns
+    cached = _manifests.get(manifest_path)
+    if cached is None or cached[0] != mtime:
+        with open(manifest_path) as f:
+            cached = _manifests[manifest_path] = (mtime, json.load(f))
+    return cached[1]
+
+
+def _comparable(value, reference):
+    """Bring a filter value to the type of the manifest statistics (ISO strings for dates)."""
+    if isinstance(reference, str) and isinstance(value, (pd.Timestamp, datetime.date)):
+        return pd.Timestamp(value).isoformat()
+    return value
+
+
+def _may_match(stats, column, op, value):
+    """False only when the statistics prove that no row of the file matches."""
+    entry = stats.get(column)
+    if entry is None:
+        # Column absent or all-null in the file: nothing to prune on
+        return True
+    low, high = entry['min'], entry['max']
+    if op == 'in':
+        value = [_comparable(v, low) for v in value]
+        if 'values' in entry:
+            return bool(set(value) & set(entry['values']))
+        return any(low <= v <= high for v in value)
+    if op == 'between':
+        start, stop = (_comparable(v, low) for v in value)
+        return not (stop < low or start > high)
+    value = _comparable(value, low)
+    if op == '==':
+        return value in entry['values'] if 'values' in entry else low <= value <= high
+    if op == '!=':
+        return not (low == high == value)
+    return {
+        '<': low < value, '<=': low <= value,
+        '>': high > value, '>=': high >= value,
+    }[op]
+
+
+def prune(path, filters=None):
+    """
+    Return the absolute paths of the files of the store at path that may hold
+    rows matching every (column, op, value) filter.
+    """
+    manifest = read_manifest(path)
+    return [
+        os.path.join(path, entry['path'])
+        for entry in manifest['files']
+        if all(_may_match(entry['stats'], column, op, value) for column, op, value in filters or [])
+    ]
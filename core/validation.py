@@ -0,0 +1,173 @@
+# declarative data validation: every rule is a vectorized mask, evaluated in one pass
+import functools
+
+import numpy as np
+import pandas as pd
+
+from core.regions import REGION_NAMES
+
+RATE_COLUMNS = ['tx_indic_7J_DC', 'tx_indic_7J_hosp', 'tx_indic_7J_SC', 'tx_prev_hosp', 'tx_prev_SC']
+
+# Columns that, with reg and jour, identify a row (present in the raw and age-class exports)
+DIMENSION_COLUMNS = ['PourAvec', 'cl_age90']
+
+ONE_DAY = np.timedelta64(1, 'D')
+
+
+class Rule:
+    """
+    One validation rule: `check(frame)` returns a boolean NumPy mask of the
+    violating rows of a _Frame. Rules whose columns are missing are skipped.
+    Errors make a dataset unusable, warnings are only reported.
+    """
+
+    def __init__(self, name, description, columns, check, severity='error'):
+        self.name = name
+        self.description = description
+        self.columns = columns
+        self.check = check
+        self.severity = severity
+
+
+class _Frame:
+    """
+    Column arrays of the validated frame, extracted once and shared by all
+    rules, plus the (series, jour) sort order used by the duplicate and
+    continuity rules.
+    """
+
+    def __init__(self, df):
+        self.df = df
+
+    def column(self, name):
+        return self.df[name].to_numpy()
+
+    @functools.cached_property
+    def jour(self):
+        # Raw exports hold ISO strings; unparseable dates become NaT
+        return pd.to_datetime(self.df['jour'], format='%Y-%m-%d', errors='coerce').to_numpy('datetime64[ns]')
+
+    @functools.cached_property
+    def series(self):
+        """Integer id of the series of each row: reg plus the dimension columns present."""
+        keys = ['reg'] + [c for c in DIMENSION_COLUMNS if c in self.df.columns]
+        return self.df.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+
+    @functools.cached_property
+    def order(self):
+        """Row positions sorted by series then date."""
+        return np.lexsort((self.jour, self.series))
+
+    @functools.cached_property
+    def same_series_as_previous(self):
+        """In sorted order: True where the row continues the previous row's series."""
+        series = self.series[self.order]
+        return np.concatenate([[False], series[1:] == series[:-1]])
+
+    @functools.cached_property
+    def step(self):
+        """In sorted order: days since the previous row of the same series (NaT on series starts)."""
+        jour = self.jour[self.order]
+        step = np.full(len(jour), np.timedelta64('NaT'), dtype='timedelta64[ns]')
+        step[1:] = jour[1:] - jour[:-1]
+        step[~self.same_series_as_previous] = np.timedelta64('NaT')
+        return step
+
+    def unsort(self, sorted_mask):
+        """Map a mask computed in sorted order back to row order."""
+        mask = np.zeros(len(sorted_mask), dtype=bool)
+        mask[self.order] = sorted_mask
+        return mask
+
+
+def _negative_rates(frame):
+    columns = [c for c in RATE_COLUMNS if c in frame.df.columns]
+    values = frame.df[columns].to_numpy(dtype=float)
+    # NaN compares False: missing rates are not negative rates
+    return (values < 0).any(axis=1)
+
+def _missing_dates(frame):
+    return np.isnat(frame.jour)
+
+def _unknown_regions(frame):
+    return ~np.isin(frame.column('reg'), np.array(list(REGION_NAMES)))
+
+def _duplicate_keys(frame):
+    return frame.unsort(frame.same_series_as_previous & (frame.step == np.timedelta64(0)))
+
+def _date_gaps(frame):
+    # Flags the first row after each gap; NaT steps compare False
+    return frame.unsort(frame.step > ONE_DAY)
+
+
+RULES = [
+    Rule('non_negative_rates', 'Rates (per 100,000 inhabitants) are never negative', [], _negative_rates),
+    Rule('missing_dates', 'Every row has a valid date', ['jour'], _missing_dates),
+    Rule('known_region_codes', 'Region codes are known INSEE region codes', ['reg'], _unknown_regions, severity='warning'),
+    Rule('duplicate_keys', 'No two rows share the same (reg, jour) key', ['reg', 'jour'], _duplicate_keys),
+    Rule('date_continuity', 'Each region has one row per day, without gaps', ['reg', 'jour'], _date_gaps, severity='warning'),
+]
+
+
+class ValidationReport:
+    """
+    Outcome of validate(): `summary` has one row per rule (violations is NaN
+    for skipped rules) and `samples[rule]` holds the first violating rows.
+    """
+
+    def __init__(self, summary, samples, rows):
+        self.summary = summary
+        self.samples = samples
+        self.rows = rows
+
+    @property
+    def errors(self):
+        failed = self.summary[(self.summary['severity'] == 'error') & (self.summary['violations'] > 0)]
+        return list(failed['rule'])
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def describe(self):
+        """One line per failed rule, for logs and error messages."""
+        failed = self.summary[self.summary['violations'] > 0]
+        return [f"{row.rule}: {int(row.violations)} rows ({row.severity})" for row in failed.itertuples()]
+
+    def raise_for_errors(self):
+        """Raise ValueError listing the error violations, if any: such data is not loaded."""
+        if not self.ok:
+            problems = [line for line in self.describe() if line.endswith("(error)")]
+            raise ValueError(f"Invalid data: {'; '.join(problems)}")
+
+
+def validate(df, rules=RULES, samples=5):
+    """
+    Evaluate every rule on df in one pass and collect all violations instead
+    of stopping at the first one.
+
+    Args:
+        df (pd.DataFrame): raw export or prepared table (needs reg and jour).
+        rules (list): Rule objects, RULES by default.
+        samples (int): number of violating rows kept per rule.
+    Returns:
+        ValidationReport
+    """
+    frame = _Frame(df)
+    active = [rule for rule in rules if all(c in df.columns for c in rule.columns)]
+
+    # One (n_rules, n_rows) matrix: counts and samples come from the same masks
+    masks = np.vstack([rule.check(frame) for rule in active]) if active else np.zeros((0, len(df)), dtype=bool)
+    counts = dict(zip([rule.name for rule in active], masks.sum(axis=1)))
+
+    summary = pd.DataFrame({
+        'rule': [rule.name for rule in rules],
+        'description': [rule.description for rule in rules],
+        'severity': [rule.severity for rule in rules],
+        'violations': [counts.get(rule.name, np.nan) for rule in rules],
+    })
+    sample_rows = {
+        rule.name: df.iloc[np.flatnonzero(mask)[:samples]]
+        for rule, mask in zip(active, masks) if mask.any()
+    }
+    return ValidationReport(summary, sample_rows, len(df))
@@ -0,0 +1,41 @@
+# national smoothing and epidemic wave detection (no Streamlit, no charts)
+import pandas as pd
+from scipy.signal import find_peaks
+
+def national_series(df):
+    """
+    Daily national mean hospitalization rate and its 7-day centered smoothing.
+    Rates are per 100,000 inhabitants, so the regional rates are averaged unweighted.
+    """
+    # Aggregate daily hospitalization rates to national mean
+    df_national = df.groupby('jour')['tx_indic_7J_hosp'].mean().reset_index()
+    df_national.rename(columns={'tx_indic_7J_hosp': 'tx_moyen_national_hosp_7j'}, inplace=True)
+    df_national = df_national.sort_values(by='jour')
+
+    # Smooth the national mean series using rolling window
+    df_national['tx_lisse'] = df_national['tx_moyen_national_hosp_7j'].rolling(window=7, center=True, min_periods=1).mean()
+    return df_national
+
+def detect_waves(df):
+    """
+    Detect the epidemic waves as the peaks of the smoothed national rate.
+    Returns:
+        (df_national, df_waves, df_peaks): the national series, the table of
+        waves (Date_of_peak, Value_of_peak_Smoothed_Average_Rate, Waves) and
+        the national rows of the peaks labelled with their wave.
+    """
+    df_national = national_series(df)
+
+    # Detect peaks corresponding to epidemic waves
+    peaks, _ = find_peaks(df_national['tx_lisse'], prominence=0.5, distance=60)
+
+    # Create a table of detected waves
+    df_waves = df_national.iloc[peaks][['jour', 'tx_lisse']].copy()
+    df_waves.rename(columns={'jour': 'Date_of_peak', 'tx_lisse': 'Value_of_peak_Smoothed_Average_Rate'}, inplace=True)
+    df_waves['Waves'] = [f"Wave {i+1}" for i in range(len(df_waves))]
+    df_waves['Date_of_peak'] = pd.to_datetime(df_waves['Date_of_peak'])
+
+    # Prepare peaks DataFrame for plotting
+    df_peaks = df_national.iloc[peaks].copy()
+    df_peaks['Waves'] = [f"Wave {i+1}" for i in range(len(peaks))]
+    return df_national, df_waves, df_peaks
@@ -1,4 +1,15 @@
 from . import intro
 from . import overview
 from . import deep_dives
+from . import alerts
 from . import conclusions
+from . import performance
+
+# Sidebar navigation of app.py: page title -> section module (a write(df_raw, tables) function)
+PAGES = {
+    "Introduction": intro,
+    "Dashboard Overview": overview,
+    "Regional Deep Dive": deep_dives,
+    "Alerts": alerts,
+    "Conclusions": conclusions
+}
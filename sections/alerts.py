@@ -0,0 +1,61 @@
+# surge alerts from the incremental rolling statistics
+import pandas as pd
+import streamlit as st
+from utils.rolling import ALERT_FLOOR, rolling_stats
+from utils.viz import INDICATOR_NAMES, alerts_chart
+
+def write(df_raw, tables):
+    """
+    Writes the alerts page of the Streamlit app.
+    Reads the state of the rolling statistics engine instead of rescanning history.
+    """
+    st.header("🚨 Surge Alerts")
+    st.markdown("---")
+
+    selected_regions = st.session_state.get('regions', [])
+    selected_date = st.session_state.get('selected_date')
+    if not selected_regions:
+        st.warning("Please select at least one region in the sidebar.")
+        return
+
+    # Kept up to date by the data refresh (see utils.rolling.advance)
+    state = tables["rolling"] if "rolling" in tables else rolling_stats(tables["full"])
+
+    st.info("""
+    For every region and indicator, the dashboard keeps a **7-day rolling mean and variance** and the **weekly growth rate**, updated day by day as new data arrives.
+    A day is flagged as a **surge** when its weekly growth rate is more than *k* standard deviations above the growth rates of the previous four weeks.
+
+    ➡️ *Lower k to see weaker surges, or change the regions in the sidebar.*
+    """)
+    k = st.slider("Alert threshold k (sigma)", min_value=ALERT_FLOOR, max_value=6.0, value=3.0, step=0.5)
+
+    # --- Alerts up to the selected date ---
+    df_alerts = state.alerts_frame()
+    df_alerts = df_alerts[
+        df_alerts['region_name'].isin(selected_regions)
+        & (df_alerts['z_score'] >= k)
+        & (df_alerts['jour'] <= pd.Timestamp(selected_date))
+    ].copy()
+    df_alerts['indicator_name'] = df_alerts['indicator'].map(INDICATOR_NAMES)
+
+    recent = df_alerts[df_alerts['jour'] > pd.Timestamp(selected_date) - pd.Timedelta(days=14)]
+    col1, col2 = st.columns(2)
+    col1.metric("Alerts in the last 14 days", len(recent))
+    col2.metric("Alerts since the start", len(df_alerts))
+
+    if df_alerts.empty:
+        st.success("No surge above this threshold for the selected regions.")
+    else:
+        st.altair_chart(alerts_chart(df_alerts), use_container_width=True)
+        st.markdown("##### Latest alerts")
+        st.dataframe(
+            df_alerts[['jour', 'region_name', 'indicator_name', 'value', 'weekly_growth', 'z_score']].head(50),
+            hide_index=True
+        )
+
+    # --- Current rolling statistics ---
+    st.markdown(f"##### Rolling statistics on {pd.Timestamp(state.last_day):%d/%m/%Y}")
+    snapshot = state.snapshot()
+    snapshot = snapshot[snapshot['region_name'].isin(selected_regions)].copy()
+    snapshot['indicator'] = snapshot['indicator'].map(INDICATOR_NAMES)
+    st.dataframe(snapshot, hide_index=True)
@@ -34,6 +34,7 @@ def write(df_raw, tables):
 
     2. **Predictive Modeling:**  
        Develop time-series models to forecast hospitalizations, deaths, or ICU occupancy. This can inform early-warning systems for future waves or other health crises.
+       A first step is available: tick **Show 14-day forecast** in the sidebar to overlay short-horizon forecasts (damped exponential smoothing) with 95% intervals.
 
     3. **Policy Simulation & Scenario Planning:**  
        Simulate interventions such as vaccination campaigns, lockdown measures, or hospital capacity expansions to evaluate their potential effectiveness.
@@ -1,7 +1,9 @@
 # comparisons, distributions, drilldowns
 import streamlit as st
-from utils.viz import combo_chart, death_rate_during_peaks, hospitalization_growth_rate_chart, ranked_bar_chart, waves
+from utils.viz import INDICATOR_NAMES, combo_chart, death_rate_during_peaks, hospitalization_growth_rate_chart, lag_heatmap, ranked_bar_chart, waves
 from utils.prep import get_filtered_data
+from utils.forecast import forecast_table
+from utils.correlation import lag_correlations, lead_lag_table
 
 def write(df_raw, tables):
     """
@@ -44,10 +46,11 @@ def write(df_raw, tables):
     ➡️ *Select a region from the dropdown below to see the combined chart.*
     """)
     all_regions = sorted(df["region_name"].dropna().unique())
-    region = st.selectbox("Select a Region", all_regions, index=0)
+    region = st.selectbox("Select a Region", all_regions, index=0, key="deep_dive_region")
 
     if region:
-        chart_obj = combo_chart(df, region)
+        forecast = forecast_table(df) if st.session_state.get('show_forecast') else None
+        chart_obj = combo_chart(df, region, forecast=forecast)
         st.altair_chart(chart_obj, use_container_width=True)
     else:
         st.warning("Please select a region to view the chart.")
@@ -60,11 +63,30 @@ def write(df_raw, tables):
     **First wave** peaked on 31 March 2020, followed by a small wave in June. 
     The **highest wave** peaked on 20 January 2022, corresponding to the Omicron variant.
     """)
-    df_waves, fig_waves = waves(df)
+    # Waves precomputed by `python -m core` are only present when they match the loaded data
+    df_waves, fig_waves = waves(df, tables.get("waves"))
     st.altair_chart(fig_waves, use_container_width=True)
     st.markdown("##### COVID-19 Epidemic Waves Table")
     st.dataframe(df_waves)
 
+    # --- Lead / lag between regions and indicators ---
+    st.info("""
+    Do some regions **lead** others, and how long does it take for hospitalizations to turn into critical care and deaths?
+    Each cell shows the lag (in days, within ±60) at which the two series are most correlated: **blue** (positive) means the column series moves first, **red** (negative) means the row series does.
+    Faded cells are weakly correlated. On the diagonal, the lag of the same region shows the delay between the two indicators.
+
+    ➡️ *Pick the two indicators to compare below.*
+    """)
+    indicator_names = INDICATOR_NAMES
+    col1, col2 = st.columns(2)
+    indicator_a = col1.selectbox("Rows", list(indicator_names), index=2, format_func=indicator_names.get)
+    indicator_b = col2.selectbox("Columns", list(indicator_names), index=0, format_func=indicator_names.get)
+    df_lags = lead_lag_table(lag_correlations(df), indicator_a, indicator_b)
+    st.altair_chart(
+        lag_heatmap(df_lags, indicator_names[indicator_a], indicator_names[indicator_b]),
+        use_container_width=True
+    )
+
     # --- Death rate during peaks ---
     st.info("""
     During the **first waves (spring and autumn 2020)**, hospitalization surges were closely followed by increases in deaths due to limited treatments and ICU overload.
@@ -1,6 +1,6 @@
 # sections/intro.py
 import streamlit as st
-from utils.prep import show_data_quality, cleaning, feature_engineering, validate_data
+from utils.prep import show_data_quality, show_validation_report, cleaning, feature_engineering
 st.set_page_config(page_title="Data Storytelling Dashboard", layout="wide")
 
 def write(df_raw, tables):
@@ -43,7 +43,7 @@ def write(df_raw, tables):
 
     # Timeseries chart
     st.subheader("Hospitalization Rates Over Time (Accumulated)")
-    timeseries = df.groupby('jour')['tx_indic_7J_hosp'].sum().reset_index()
+    timeseries = tables["timeseries"]
     st.line_chart(timeseries.set_index('jour')['tx_indic_7J_hosp'])  # type: ignore  
 
     st.info(
@@ -96,10 +96,9 @@ def write(df_raw, tables):
     df_cleaned = cleaning(df_raw.copy())
     show_data_quality(df_cleaned)
 
-    # Feature engineering
-    df_clean = cleaning(df_raw.copy())
-    df_features = feature_engineering(df_clean)
-    df_validated = validate_data(df_features)
+    # Validation rules, evaluated once when the data is loaded
+    st.subheader("Validation Rules")
+    show_validation_report(tables["validation"])
 
     st.markdown("---")
     st.header("ℹ️ Feature Engineering")
@@ -119,4 +118,4 @@ def write(df_raw, tables):
     )
 
     st.subheader("Data Overview (After Cleaning)")
-    st.dataframe(df_validated.head(20))
+    st.dataframe(df.head(20))
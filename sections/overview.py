@@ -1,6 +1,8 @@
 import streamlit as st
+from core import store
 from utils.viz import bar_chart_death, line_chart, map_chart, map_chart2
-from utils.prep import get_filtered_data
+from utils.prep import AGE_CLASSES, get_age_data, get_filtered_data, get_kpis, level_view
+from utils.forecast import forecast_table
 
 def write(df_raw, tables):
     """
@@ -11,39 +13,67 @@ def write(df_raw, tables):
     st.header("📶 Dashboard Overview")
     st.markdown("---")
 
-    # --- Get selected regions and date from session state ---
-    regions = st.session_state.get('regions', [])
+    # --- Get selected regions (or departments) and date from session state ---
+    level = st.session_state.get('level', 'region')
+    df_level, key = level_view(tables, level)
+    if key == 'dep_name':
+        level = 'department'
+        regions = st.session_state.get('departments', [])
+    else:
+        level = 'region'
+        regions = st.session_state.get('regions', [])
     selected_date = st.session_state.get("selected_date")
 
     if not regions:
-        st.warning("Please select at least one region in the sidebar to view the charts.")
+        st.warning(f"Please select at least one {level} in the sidebar to view the charts.")
         return
 
     # --- Filter data using cached function ---
-    filtered_df, latest_data = get_filtered_data(df, regions, selected_date)
+    filtered_df, latest_data = get_filtered_data(df_level, regions, selected_date, key=key)
+
+    # --- Age class: read from the partitioned age store instead of the all-ages table ---
+    age = st.session_state.get('age', 0)
+    by_age = bool(age) and key == 'region_name' and tables.get('age') is not None
+    if by_age:
+        filtered_df, latest_data = get_age_data(tables['age'], store.version(tables['age']), regions, age, selected_date)
+        st.caption(f"KPIs, line chart and death rates for the **{AGE_CLASSES[age]}** age class.")
 
     # --- KPI Row ---
     st.subheader("📊 Key Performance Indicators (Based on Selected Date)")
     avg_hosp_rate = latest_data['tx_indic_7J_hosp'].mean()
     avg_dc_rate = latest_data['tx_indic_7J_DC'].mean()
+    hosp_delta = dc_delta = None
+    # KPIs precomputed by `python -m core` (only loaded when they match the data) add the 7-day change
+    kpis = tables.get('kpis')
+    if kpis is not None and not by_age:
+        latest_kpis = get_kpis(kpis, level, regions, selected_date)
+        if not latest_kpis.empty:
+            avg_hosp_rate = latest_kpis['tx_indic_7J_hosp'].mean()
+            avg_dc_rate = latest_kpis['tx_indic_7J_DC'].mean()
+            hosp_delta = f"{latest_kpis['tx_indic_7J_hosp_change_7d'].mean():+.2f} over 7 days"
+            dc_delta = f"{latest_kpis['tx_indic_7J_DC_change_7d'].mean():+.2f} over 7 days"
 
     c1, c2, c3 = st.columns(3)
     c1.metric(
         "Average New Hospitalization Rate (7-day)", 
         f"{avg_hosp_rate:.2f}", 
+        delta=hosp_delta,
+        delta_color="inverse",
         help=f"Average 7-day hospitalization rate for selected regions on {selected_date.strftime('%d/%m/%Y')}."
     )
-    c2.metric("Number of Regions Selected", len(regions))
+    c2.metric(f"Number of {level.capitalize()}s Selected", len(regions))
     c3.metric(
         "Average Death Rate (7-day)", 
         f"{avg_dc_rate:.2f}", 
+        delta=dc_delta,
+        delta_color="inverse",
         help=f"Average 7-day death rate for selected regions on {selected_date.strftime('%d/%m/%Y')}."
     )
 
     st.markdown("---")
 
     # --- Display aggregated chart by region ---
-    by_region = df.groupby('region_name')['tx_indic_7J_hosp'].sum().reset_index()
+    by_region = tables["by_region"]
     st.info(
         "While the national trend shows an overall pattern, the impact has been different depending on the regions. "
         "Regions like **Provence-Alpes-Côte d'Azur** and **Île-de-France** experienced higher hospitalization rates during certain waves, while others like **Bretagne** had lower rates. "
@@ -61,7 +91,11 @@ def write(df_raw, tables):
         "➡️ *Other regions can be compared in the following chart by selecting them from the sidebar.*"
     )
 
-    line_chart_obj = line_chart(filtered_df, regions, title="New Hospitalizations by Region Over Time")
+    forecast = forecast_table(filtered_df if by_age else df_level, key=key) if st.session_state.get('show_forecast') else None
+    title = f"New Hospitalizations by {level.capitalize()} Over Time"
+    if by_age:
+        title += f" ({AGE_CLASSES[age]})"
+    line_chart_obj = line_chart(filtered_df, regions, title=title, key=key, forecast=forecast)
     st.altair_chart(line_chart_obj, use_container_width=True)
 
     # --- Maps ---
@@ -74,11 +108,11 @@ def write(df_raw, tables):
     col1, col2 = st.columns(2)
     with col1:
         st.markdown("**Map 1: Hospitalization Rate in France**")
-        st.altair_chart(map_chart(df), use_container_width=False)
+        st.altair_chart(map_chart(tables["rollups"][level], level=level), use_container_width=False)
 
     with col2:
         st.markdown("**Map 2: Death Rate in France**")
-        st.altair_chart(map_chart2(df), use_container_width=False)
+        st.altair_chart(map_chart2(tables["rollups"][level], level=level), use_container_width=False)
 
     st.markdown("⚠️ Note: DOM-TOM regions are not shown on the map due to the lack of a suitable GeoJSON file.")
 
@@ -89,5 +123,5 @@ def write(df_raw, tables):
         "➡️ *Other regions can be compared in the following chart by selecting them from the sidebar.*"
     )
 
-    bar_chart_obj = bar_chart_death(filtered_df, selected_date)
+    bar_chart_obj = bar_chart_death(filtered_df, selected_date, key=key)
     st.altair_chart(bar_chart_obj, use_container_width=True)
@@ -0,0 +1,59 @@
+# sidebar performance panel: spans of the last rerun, latency percentiles, caches
+import pandas as pd
+import streamlit as st
+
+from core import perf
+from core.cache import cache_stats
+
+
+def write_panel(recorder, warmup=None):
+    """
+    Writes the optional "Performance" panel in the sidebar for a finished rerun,
+    with the status of the startup warm-up if one was started.
+    """
+    st.header("Performance")
+    st.metric("Rerun time", f"{recorder.total_s * 1000:.0f} ms")
+
+    if warmup is not None:
+        if not warmup.done.is_set():
+            st.caption("Warm-up running...")
+        elif warmup.error:
+            st.caption(f"Warm-up failed after {warmup.duration_s:.2f} s: {warmup.error}")
+        else:
+            st.caption(f"Warm-up finished in {warmup.duration_s:.2f} s ({len(warmup.timings)} steps)")
+
+    # --- Spans of this rerun, in call order and indented by nesting ---
+    spans = sorted(recorder.spans, key=lambda s: s["start_s"])
+    df_spans = pd.DataFrame({
+        "span": ["  " * s["depth"] + s["name"] for s in spans],
+        "ms": [s["wall_s"] * 1000 for s in spans],
+        "peak alloc KB": [s.get("peak_alloc_bytes", 0) / 1024 for s in spans],
+        "cache hits": [s["cache_hits"] for s in spans],
+        "payload KB": [s.get("payload_bytes", 0) / 1024 for s in spans],
+    })
+    st.dataframe(df_spans.round(1), hide_index=True)
+
+    # --- Rerun latency per page since the process started ---
+    summary = perf.latency_summary()
+    if summary:
+        st.subheader("Rerun latency")
+        df_latency = pd.DataFrame([
+            {"page": page, "reruns": s["count"], "p50 ms": s["p50_s"] * 1000, "p95 ms": s["p95_s"] * 1000}
+            for page, s in summary.items()
+        ])
+        st.dataframe(df_latency.round(1), hide_index=True)
+
+    # --- Bounded caches ---
+    stats = cache_stats()
+    if stats:
+        st.subheader("Caches")
+        df_caches = pd.DataFrame([
+            {
+                "function": name.rsplit(".", 1)[-1],
+                "hit rate": s["hit_rate"],
+                "evictions": s["evictions"],
+                "resident MB": s["resident_bytes"] / 1024 ** 2,
+            }
+            for name, s in stats.items()
+        ])
+        st.dataframe(df_caches.round(2), hide_index=True)
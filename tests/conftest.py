@@ -0,0 +1,21 @@
+import pytest
+
+from bench import synthetic
+
+# The app modules read their data path when imported: point them at the
+# synthetic file of the rerun budgets before any test imports them
+synthetic.use_data(synthetic.write("bench/data", "reg", 3))
+
+from core.prep import make_tables  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def raw():
+    """One synthetic year of the regional export, as read from the CSV."""
+    return synthetic.generate("reg", years=1)
+
+
+@pytest.fixture(scope="session")
+def tables(raw):
+    """Prepared tables of raw; shared by the tests, which must not modify them."""
+    return make_tables(raw.copy())
@@ -0,0 +1,25 @@
+import os
+
+from bench import synthetic
+from core import artifacts, store
+
+
+def test_age_stores_are_versioned_and_pruned(tmp_path):
+    age = synthetic.generate("reg", years=1, age=True)
+    age = age[age["reg"].isin([11, 53])]
+    age_path = str(tmp_path / "age.csv")
+    out_dir = str(tmp_path / "artifacts")
+
+    paths = []
+    for version in range(artifacts.AGE_VERSIONS_KEPT + 1):
+        age.assign(tx_indic_7J_hosp=age["tx_indic_7J_hosp"] + version).to_csv(age_path, sep=";", index=False)
+        os.utime(age_path, ns=(version * 10 ** 9, version * 10 ** 9))
+        paths.append(artifacts.build_age_store(age_path, out_dir))
+
+    assert len(set(paths)) == len(paths)
+    assert sorted(os.listdir(os.path.join(out_dir, "age"))) == sorted(os.path.basename(p) for p in paths[1:])
+    assert store.is_store(paths[-1])
+    # Same file: the published store is reused, not rewritten
+    version = store.version(paths[-1])
+    assert artifacts.build_age_store(age_path, out_dir) == paths[-1]
+    assert store.version(paths[-1]) == version
@@ -0,0 +1,93 @@
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from core.cache import BoundedCache, bounded_cache, sizeof
+
+
+def frame(n=1000):
+    return pd.DataFrame({"x": np.arange(n, dtype=float)})
+
+
+def test_entry_cap_evicts_least_recently_used():
+    cache = BoundedCache("tests.entries", max_bytes=1024 ** 2, max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_evicts_until_resident_bytes_fit():
+    size = sizeof(frame())
+    cache = BoundedCache("tests.bytes", max_bytes=int(size * 2.5))
+    for key in range(4):
+        cache.put(key, frame())
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 2
+    assert stats["resident_bytes"] == 2 * size <= cache.max_bytes
+    assert cache.get(0) == (False, None)
+    assert cache.get(3)[0]
+
+
+def test_values_over_the_whole_budget_are_not_stored():
+    cache = BoundedCache("tests.too_large", max_bytes=100)
+    cache.put("big", frame())
+
+    assert cache.get("big") == (False, None)
+    assert cache.stats()["resident_bytes"] == 0
+
+
+def test_sizeof_counts_the_frames_of_a_chart():
+    df = frame(10_000)
+    chart = alt.Chart(df).mark_line().encode(x="x:Q", y="x:Q")
+    layered = alt.layer(chart, chart.mark_point())
+
+    assert sizeof(chart) >= sizeof(df)
+    # The frame is shared by both layers and counted once
+    assert sizeof(df) <= sizeof(layered) < 2 * sizeof(df)
+
+
+def test_sizeof_counts_object_attributes():
+    class State:
+        def __init__(self):
+            self.values = np.zeros(10_000)
+
+    assert sizeof(State()) >= 80_000
+
+
+def test_bounded_cache_keys_on_frame_content():
+    calls = []
+
+    @bounded_cache(max_bytes=1024 ** 2, name="tests.total")
+    def total(df):
+        calls.append(1)
+        return df["x"].sum()
+
+    df = frame()
+    assert total(df) == total(df.copy()) == df["x"].sum()
+    assert len(calls) == 1
+
+    changed = df.assign(x=df["x"] + 1)
+    assert total(changed) == df["x"].sum() + len(df)
+    assert len(calls) == 2
+
+
+def test_positional_keyword_and_defaulted_calls_share_a_key():
+    calls = []
+
+    @bounded_cache(max_bytes=1024 ** 2, name="tests.scaled")
+    def scaled(df, factor=2, column="x"):
+        calls.append(1)
+        return df[column].sum() * factor
+
+    df = frame()
+    assert scaled(df) == scaled(df, 2) == scaled(df, factor=2, column="x") == scaled(df=df)
+    assert len(calls) == 1
+    assert scaled.cache_stats()["entries"] == 1
@@ -0,0 +1,46 @@
+import datetime
+import json
+import os
+
+import pytest
+
+from utils import export
+
+REGIONS = ["Bretagne", "Corse"]
+
+
+def test_export_writes_every_chart_and_the_index(tables, tmp_path):
+    result = export.export(REGIONS, formats=("json",), out_dir=str(tmp_path), workers=1, tables=tables)
+
+    names = set(result["charts"])
+    assert {"overview-line", "overview-map", "deep-dive-ranked", "alerts"} <= names
+    assert {f"deep-dive-combo-{export.slug(r)}" for r in REGIONS} <= names
+    for paths in result["charts"].values():
+        assert all(os.path.exists(p) for p in paths)
+    index = open(result["index"], encoding="utf-8").read()
+    assert all(f'href="{name}.json"' in index for name in names)
+
+
+def test_maps_are_inlined_from_the_shipped_boundaries(tables, tmp_path):
+    result = export.export(REGIONS, formats=("json",), out_dir=str(tmp_path), workers=1, tables=tables)
+    with open(result["charts"]["overview-map"][0], encoding="utf-8") as f:
+        spec = json.load(f)
+
+    assert "url" not in json.dumps(spec["data"])
+    names = {feature["properties"]["nom"] for feature in spec["data"]["values"]}
+    assert set(REGIONS) <= names
+
+
+def test_a_period_export_titles_the_maps_with_the_period(tables, tmp_path):
+    period = (datetime.date(2020, 6, 1), datetime.date(2020, 8, 31))
+    specs = export.specs(tables, REGIONS, period[1], period)
+
+    assert specs["overview-map"]["title"].endswith("01/06/2020 - 31/08/2020")
+    assert specs["overview-map-deaths"]["title"].endswith("01/06/2020 - 31/08/2020")
+
+
+def test_unknown_regions_and_formats_are_rejected(tables, tmp_path):
+    with pytest.raises(ValueError, match="Unknown regions"):
+        export.export(["Atlantis"], formats=("json",), out_dir=str(tmp_path), tables=tables)
+    with pytest.raises(ValueError, match="Unknown export formats"):
+        export.export(REGIONS, formats=("gif",), out_dir=str(tmp_path), tables=tables)
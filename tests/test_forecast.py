@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from utils.forecast import fit_forecast, forecast_table
+
+
+def test_constant_series_forecasts_its_level():
+    Y = np.full((2, 60), 5.0)
+    mean, lower, upper = fit_forecast(Y, horizon=7)
+
+    assert mean.shape == (2, 7)
+    np.testing.assert_allclose(mean, 5.0)
+    np.testing.assert_allclose(lower, 5.0)
+    np.testing.assert_allclose(upper, 5.0)
+
+
+def test_trend_is_damped_and_intervals_widen():
+    t = np.arange(120, dtype=float)
+    Y = np.vstack([10 + 0.5 * t, 80 - 0.5 * t])
+    mean, lower, upper = fit_forecast(Y, horizon=14)
+
+    steps = np.diff(mean, axis=1)
+    assert (steps[0] > 0).all() and (steps[1] < 0).all()
+    # Each day adds phi times the previous day's trend
+    assert (np.abs(steps[:, 1:]) < np.abs(steps[:, :-1])).all()
+    assert (lower <= mean).all() and (mean <= upper).all()
+    assert (np.diff(upper - lower, axis=1) >= 0).all()
+
+
+def test_missing_days_and_zero_floor():
+    Y = np.linspace(10, 0.1, 60)[None, :].repeat(2, axis=0)
+    Y[0, 20:30] = np.nan
+    mean, lower, _ = fit_forecast(Y, horizon=30)
+
+    assert np.isfinite(mean).all()
+    assert (mean >= 0).all() and (lower >= 0).all()
+
+
+def test_forecast_table_covers_every_entity_and_indicator(tables):
+    df = tables["full"]
+    table = forecast_table(df, horizon=5)
+
+    entities = df["region_name"].nunique()
+    assert len(table) == entities * 3 * 5
+    assert table["jour"].min() == df["jour"].max() + pd.Timedelta(days=1)
+    assert table.groupby(["region_name", "indicator"]).size().eq(5).all()
@@ -0,0 +1,33 @@
+import numpy as np
+
+from core import perf
+
+
+def spans_by_name(recorder):
+    return {s["name"]: s for s in recorder.spans}
+
+
+def test_peak_alloc_counts_memory_freed_before_the_span_ends():
+    perf.start_rerun(allocations=True)
+    with perf.span("outer"):
+        with perf.span("temporary"):
+            block = np.ones(1_000_000)
+            del block
+        kept = np.ones(100_000)
+    spans = spans_by_name(perf.finish_rerun())
+
+    # 8 MB were held inside "temporary" even though they were freed before it returned
+    assert spans["temporary"]["peak_alloc_bytes"] >= 8_000_000
+    # The peak of a nested span is also the enclosing span's
+    assert spans["outer"]["peak_alloc_bytes"] >= spans["temporary"]["peak_alloc_bytes"]
+    assert kept.size
+
+
+def test_peak_alloc_is_never_negative():
+    block = np.ones(1_000_000)
+    perf.start_rerun(allocations=True)
+    with perf.span("free"):
+        del block
+    spans = spans_by_name(perf.finish_rerun())
+
+    assert spans["free"]["peak_alloc_bytes"] >= 0
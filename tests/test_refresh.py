@@ -0,0 +1,12 @@
+import pandas as pd
+
+from core import artifacts
+from utils import refresh
+
+
+def test_refreshed_snapshots_have_the_artifact_kpis_and_waves(raw, tables):
+    snapshot = refresh.build_snapshot(raw, "drop.csv")
+
+    pd.testing.assert_frame_equal(snapshot.tables["kpis"], artifacts.kpi_table(tables))
+    for name, table in artifacts.wave_tables(tables["full"]).items():
+        pd.testing.assert_frame_equal(snapshot.tables["waves"][name], table)
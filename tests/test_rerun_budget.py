@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from bench.rerun_budget import BUDGETS_PATH, SLACK, TOLERANCE, calibrate, check, measure, to_budgets
+
+MEASURES = {"Alerts/rerun": {"latency_s": 2.0, "peak_bytes": 100 * 1024 ** 2}}
+
+
+def test_latency_budgets_scale_with_the_calibration():
+    budgets = to_budgets(MEASURES, unit_s=0.1, headroom=1.0)
+    assert budgets["Alerts/rerun"]["latency"] == 20
+
+    # Same code on a machine twice as slow: measured and calibrated times double
+    slower = {"Alerts/rerun": {"latency_s": 4.0, "peak_bytes": 100 * 1024 ** 2}}
+    assert check(slower, budgets, unit_s=0.2, tolerance=1.2) == []
+    # Slower code on the same machine
+    assert check(slower, budgets, unit_s=0.1, tolerance=1.2) == [
+        "Alerts/rerun: latency_s 4 > 2.4 (budget 2)"
+    ]
+
+
+def test_slack_absorbs_timer_noise_and_missing_budgets_fail():
+    budgets = {"Alerts/rerun": {"latency": 0.01, "peak_bytes": 1}}
+    fast = {"Alerts/rerun": {"latency_s": SLACK["latency_s"], "peak_bytes": SLACK["peak_bytes"]}}
+
+    assert check(fast, budgets, unit_s=1.0, tolerance=1.5) == []
+    assert check({"Conclusions/rerun": fast["Alerts/rerun"]}, budgets, 1.0, 1.5) == [
+        "Conclusions/rerun: no budget recorded (run with --update)"
+    ]
+
+
+@pytest.mark.slow
+def test_every_page_reruns_within_its_budget():
+    # Same run as python -m bench.rerun_budget: AppTest sessions through every page
+    unit_s = calibrate()
+    measures = measure()
+    unit_s = (unit_s + calibrate()) / 2
+    with open(BUDGETS_PATH) as f:
+        budgets = json.load(f)
+
+    assert check(measures, budgets, unit_s, TOLERANCE) == []
@@ -0,0 +1,19 @@
+import pandas as pd
+
+from utils.rolling import advance
+
+
+def test_advance_matches_a_replay_of_the_history(tables):
+    df = tables["full"]
+    cut = df["jour"].max() - pd.Timedelta(days=30)
+    state = advance(None, df[df["jour"] <= cut])
+
+    advanced = advance(state, df)
+    replayed = advance(None, df)
+
+    pd.testing.assert_frame_equal(
+        advanced.alerts_frame().reset_index(drop=True),
+        replayed.alerts_frame().reset_index(drop=True),
+    )
+    # The previous state is left as it was, for the sessions still reading it
+    assert state.alerts_frame()["jour"].max() <= cut
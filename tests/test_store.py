@@ -0,0 +1,32 @@
+import os
+
+import pandas as pd
+
+from core import store
+
+
+def prepared(raw):
+    return raw.assign(jour=pd.to_datetime(raw["jour"]))
+
+
+def test_prune_keeps_only_files_that_may_match(raw, tmp_path):
+    path = str(tmp_path / "store")
+    manifest = store.write_store(prepared(raw), path)
+    files = {os.path.join(path, entry["path"]) for entry in manifest["files"]}
+
+    assert set(store.prune(path)) == files
+    assert {os.path.relpath(f, path).split(os.sep)[0] for f in store.prune(path, [("reg", "==", 11)])} == {"reg=11"}
+    in_2020 = store.prune(path, [("jour", "between", (pd.Timestamp("2020-04-01"), pd.Timestamp("2020-05-01")))])
+    assert in_2020 and all(f"{os.sep}year=2020{os.sep}" in f for f in in_2020)
+    assert store.prune(path, [("reg", "in", [11, 53]), ("jour", ">", pd.Timestamp("2030-01-01"))]) == []
+
+
+def test_pruned_files_hold_every_matching_row(raw, tmp_path):
+    path = str(tmp_path / "store")
+    store.write_store(prepared(raw), path)
+    filters = [("reg", "in", [24, 94]), ("jour", ">=", pd.Timestamp("2021-01-01"))]
+
+    rows = pd.concat(pd.read_parquet(f) for f in store.prune(path, filters))
+    expected = prepared(raw)
+    expected = expected[expected["reg"].isin([24, 94]) & (expected["jour"] >= "2021-01-01")]
+    assert (rows["jour"] >= "2021-01-01").sum() == len(expected)
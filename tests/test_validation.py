@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from core.prep import make_tables
+from core.validation import validate
+
+
+def violations(report):
+    return dict(zip(report.summary["rule"], report.summary["violations"]))
+
+
+def test_synthetic_export_is_valid(raw):
+    report = validate(raw)
+
+    assert report.ok
+    assert report.rows == len(raw)
+    assert all(count == 0 for count in violations(report).values())
+    assert report.describe() == []
+
+
+def test_negative_rates_are_errors(raw):
+    df = raw.copy()
+    df.loc[[3, 7], "tx_indic_7J_hosp"] = -1.0
+    report = validate(df)
+
+    assert report.errors == ["non_negative_rates"]
+    assert violations(report)["non_negative_rates"] == 2
+    assert list(report.samples["non_negative_rates"].index) == [3, 7]
+
+
+def test_unparseable_dates_are_missing(raw):
+    df = raw.copy()
+    df.loc[0, "jour"] = "2021-02-30"
+    report = validate(df)
+
+    assert "missing_dates" in report.errors
+    assert violations(report)["missing_dates"] == 1
+
+
+def test_duplicate_rows_are_errors(raw):
+    df = raw.copy()
+    df = df.iloc[np.r_[np.arange(len(df)), [10]]]
+    report = validate(df)
+
+    assert report.errors == ["duplicate_keys"]
+    assert violations(report)["duplicate_keys"] == 1
+
+
+def test_unknown_regions_and_gaps_are_warnings(raw):
+    df = raw.copy()
+    df.loc[df["reg"] == 53, "reg"] = 99
+    # One missing day for the three PourAvec series of Île-de-France
+    df = df[~((df["reg"] == 11) & (df["jour"] == "2020-06-01"))]
+    report = validate(df)
+
+    assert report.ok
+    counts = violations(report)
+    assert counts["known_region_codes"] == (raw["reg"] == 53).sum()
+    assert counts["date_continuity"] == 3
+    assert len(report.describe()) == 2
+
+
+def test_rules_without_their_columns_are_skipped(raw):
+    report = validate(raw.drop(columns=["reg"]))
+
+    counts = violations(report)
+    assert np.isnan(counts["known_region_codes"])
+    assert np.isnan(counts["duplicate_keys"])
+    assert counts["non_negative_rates"] == 0
+
+
+def test_make_tables_rejects_data_with_errors(raw):
+    df = raw.copy()
+    # A row that cleaning keeps (deaths are only published for PourAvec 0)
+    df.loc[df.index[df["PourAvec"] == 0][0], "tx_indic_7J_hosp"] = -3.0
+
+    with pytest.raises(ValueError, match="non_negative_rates: 1 rows"):
+        make_tables(df)
+    # Warnings alone do not block the load
+    assert make_tables(raw[raw["jour"] != "2020-06-01"].copy())["validation"].ok
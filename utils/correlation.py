@@ -0,0 +1,101 @@
+# lagged cross-correlations between every region and indicator, in one FFT pass
+import numpy as np
+import pandas as pd
+
+from core.cache import bounded_cache
+from utils.forecast import FORECAST_INDICATORS, series_matrix
+
+# Number of series inverse-transformed together; bounds memory to
+# CHUNK x n_series x n_fft floats instead of n_series^2 x n_fft
+CHUNK = 8
+
+
+def _next_pow2(n):
+    return 1 << (int(n) - 1).bit_length()
+
+
+def cross_correlation_matrix(X, max_lag=60):
+    """
+    Lagged Pearson-style correlations of every pair of rows of X.
+
+    corr[i, j, max_lag + L] correlates X[i] at day t + L with X[j] at day t,
+    over the days where both are observed: a peak at L > 0 means series j
+    leads series i by L days.
+
+    Args:
+        X (np.ndarray): (n_series, n_days) matrix, NaN for missing days.
+        max_lag (int): largest lag in days, in both directions.
+    Returns:
+        (corr, lags): (n_series, n_series, 2 * max_lag + 1) array and the lags.
+    """
+    n_series, n_days = X.shape
+    observed = ~np.isnan(X)
+
+    # Standardize each series on its observed days; missing days contribute 0
+    counts = np.maximum(observed.sum(axis=1, keepdims=True), 1)
+    mean = np.where(observed, X, 0).sum(axis=1, keepdims=True) / counts
+    centered = np.where(observed, X - mean, 0.0)
+    std = np.sqrt((centered ** 2).sum(axis=1, keepdims=True) / counts)
+    Z = centered / np.where(std > 0, std, 1.0)
+
+    # Zero-padding to >= 2 * n_days turns the circular correlation into a linear one
+    n_fft = _next_pow2(2 * n_days)
+    F = np.fft.rfft(Z, n=n_fft, axis=1)
+    M = np.fft.rfft(observed.astype(float), n=n_fft, axis=1)
+
+    lags = np.arange(-max_lag, max_lag + 1)
+    # Negative lags wrap around to the end of the inverse transform
+    lag_index = lags % n_fft
+    corr = np.empty((n_series, n_series, lags.size))
+
+    for start in range(0, n_series, CHUNK):
+        stop = min(start + CHUNK, n_series)
+        products = np.fft.irfft(F[start:stop, None, :] * np.conj(F[None, :, :]), n=n_fft, axis=2)[..., lag_index]
+        overlap = np.fft.irfft(M[start:stop, None, :] * np.conj(M[None, :, :]), n=n_fft, axis=2)[..., lag_index]
+        overlap = np.rint(overlap)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr[start:stop] = np.where(overlap >= 2, products / overlap, np.nan)
+
+    return np.clip(corr, -1, 1), lags
+
+
+@bounded_cache(max_bytes=64 * 1024 ** 2, max_entries=8)
+def lag_correlations(df, key='region_name', max_lag=60, indicators=tuple(FORECAST_INDICATORS)):
+    """
+    Compute and cache the lag matrix of every (entity, indicator) pair of df.
+
+    Returns:
+        dict with 'labels' [(entity, indicator), ...], 'lags' and 'corr'
+        as returned by cross_correlation_matrix().
+    """
+    indicators = [i for i in indicators if i in df.columns]
+    X, labels, _ = series_matrix(df, key, indicators)
+    corr, lags = cross_correlation_matrix(X, max_lag)
+    return {'labels': labels, 'lags': lags, 'corr': corr}
+
+
+def lead_lag_table(result, indicator_a, indicator_b, key='region_name'):
+    """
+    Summarize the lag matrix for one pair of indicators: for every
+    (entity of indicator_a, entity of indicator_b) pair, the lag of the
+    strongest correlation and its value.
+
+    A positive best_lag means indicator_b in the second entity leads
+    indicator_a in the first entity by that many days.
+    """
+    labels = result['labels']
+    rows = [i for i, (_, ind) in enumerate(labels) if ind == indicator_a]
+    cols = [j for j, (_, ind) in enumerate(labels) if ind == indicator_b]
+    block = result['corr'][np.ix_(rows, cols)]
+
+    # All-NaN pairs (no overlap) get no best lag
+    filled = np.where(np.isnan(block), -np.inf, block)
+    best = filled.argmax(axis=2)
+    peak = np.take_along_axis(block, best[..., None], axis=2)[..., 0]
+
+    return pd.DataFrame({
+        f'{key}_a': np.repeat([labels[i][0] for i in rows], len(cols)),
+        f'{key}_b': np.tile([labels[j][0] for j in cols], len(rows)),
+        'best_lag': result['lags'][best].ravel(),
+        'peak_corr': peak.ravel(),
+    })
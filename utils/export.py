@@ -0,0 +1,238 @@
+# static snapshot export: every dashboard chart for one configuration, rendered in batch
+"""
+Render the charts of the Overview, Regional Deep Dive and Alerts pages for a
+set of regions and a date (or date range) to standalone files, plus an
+index.html report linking them:
+
+    python -m utils.export --regions all --date 2023-03-31 --formats html,svg,png --out exports/2023-03-31
+
+Charts are built in this process through the cached builders of utils/viz.py,
+on the prepared tables (precomputed artifacts when available), then rendered
+in parallel by core/render.py in a process pool.
+"""
+import argparse
+import html
+import os
+import re
+import time
+import unicodedata
+
+import altair as alt
+import pandas as pd
+
+from core import artifacts, render
+from core.io import read_data, read_department_data
+from core.prep import make_tables
+from utils import viz
+from utils.correlation import lag_correlations, lead_lag_table
+from utils.prep import get_filtered_data
+from utils.rolling import rolling_stats
+
+EXPORT_DIR = os.environ.get('DASHBOARD_EXPORT_DIR', 'exports')
+
+# Local copies of the map boundaries (same file names as the URLs of viz.GEOJSON), inlined when present
+GEOJSON_DIR = os.environ.get('DASHBOARD_GEOJSON_DIR', 'data/geojson')
+
+# Alerts page default threshold
+ALERT_K = 3.0
+
+
+def slug(text):
+    """File-name friendly version of a region name ('Île-de-France' -> 'ile-de-france')."""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def local_geojson(geojson_dir=GEOJSON_DIR):
+    """{url: local path} for the map boundaries of viz.GEOJSON available in geojson_dir."""
+    files = {}
+    for url, _ in viz.GEOJSON.values():
+        path = os.path.join(geojson_dir, os.path.basename(url))
+        if os.path.exists(path):
+            files[url] = path
+    return files
+
+
+def load_tables():
+    """Prepared tables of the current data files: the artifacts if up to date, else built from the CSV."""
+    loaded = artifacts.load()
+    if loaded is not None:
+        return loaded[1]
+    return make_tables(read_data(), read_department_data())
+
+
+def charts(tables, regions, selected_date, date_range=None):
+    """
+    Yield (name, chart) for every chart of the configuration, with the same
+    builder arguments as the pages. With a (start, end) date_range, the time
+    series and maps only cover that period.
+    """
+    df = tables["full"]
+    if date_range is not None:
+        start, end = (pd.Timestamp(d) for d in date_range)
+        df = df[df["jour"].between(start, end)]
+        map_df = df
+    else:
+        map_df = tables["rollups"]["region"]
+
+    # Overview
+    filtered_df, _ = get_filtered_data(df, regions, selected_date, key="region_name")
+    yield "overview-line", viz.line_chart(filtered_df, regions, title="New Hospitalizations by Region Over Time", key="region_name", forecast=None)
+    yield "overview-map", viz.map_chart(map_df, level="region", period=date_range)
+    yield "overview-map-deaths", viz.map_chart2(map_df, level="region", period=date_range)
+    yield "overview-deaths", viz.bar_chart_death(filtered_df, selected_date, key="region_name")
+
+    # Regional Deep Dive
+    yield "deep-dive-ranked", viz.ranked_bar_chart(df)
+    for region in regions:
+        yield f"deep-dive-combo-{slug(region)}", viz.combo_chart(df, region, forecast=None)
+    # The precomputed waves cover the whole history, not a period
+    yield "deep-dive-waves", viz.waves(df, tables.get("waves") if date_range is None else None)[1]
+    yield "deep-dive-lag", viz.lag_heatmap(
+        lead_lag_table(lag_correlations(df), "tx_indic_7J_DC", "tx_indic_7J_hosp"),
+        viz.INDICATOR_NAMES["tx_indic_7J_DC"], viz.INDICATOR_NAMES["tx_indic_7J_hosp"]
+    )
+    yield "deep-dive-death-peaks", viz.death_rate_during_peaks(df)
+    filtered_df, _ = get_filtered_data(df, regions, selected_date)
+    yield "deep-dive-growth", viz.hospitalization_growth_rate_chart(filtered_df, regions)
+
+    # Alerts: surges need the whole history, only the shown period is cut
+    state = tables["rolling"] if "rolling" in tables else rolling_stats(tables["full"])
+    df_alerts = state.alerts_frame()
+    first_day = df["jour"].min()
+    df_alerts = df_alerts[
+        df_alerts["region_name"].isin(regions)
+        & (df_alerts["z_score"] >= ALERT_K)
+        & df_alerts["jour"].between(first_day, pd.Timestamp(selected_date))
+    ].copy()
+    df_alerts["indicator_name"] = df_alerts["indicator"].map(viz.INDICATOR_NAMES)
+    yield "alerts", viz.alerts_chart(df_alerts)
+
+
+def specs(tables, regions, selected_date, date_range=None, geojson=None):
+    """{name: Vega-Lite spec dict} of charts(), with data inlined (and the geojson files of local_geojson())."""
+    result = {}
+    # The pages hand charts to Streamlit, which has no row limit either
+    with alt.data_transformers.disable_max_rows():
+        for name, chart in charts(tables, regions, selected_date, date_range):
+            spec = chart.to_dict()
+            result[name] = render.inline_urls(spec, geojson) if geojson else spec
+    return result
+
+
+def _title(spec, name):
+    title = spec.get('title', name)
+    if isinstance(title, dict):
+        title = title.get('text', name)
+    return title or name
+
+
+def write_index(out_dir, specs, paths, config):
+    """Write out_dir/index.html: one section per chart, showing the image (or page) and linking every format."""
+    sections = []
+    for name, files in paths.items():
+        files = {os.path.splitext(path)[1][1:]: os.path.basename(path) for path in files}
+        if 'svg' in files or 'png' in files:
+            view = f'<img src="{files.get("svg", files.get("png"))}" alt="{html.escape(name)}">'
+        elif 'html' in files:
+            view = f'<iframe src="{files["html"]}" width="100%" height="720" frameborder="0"></iframe>'
+        else:
+            view = ''
+        links = ' · '.join(f'<a href="{file}">{fmt}</a>' for fmt, file in files.items())
+        sections.append(f'<section><h2>{html.escape(_title(specs[name], name))}</h2>{view}<p>{links}</p></section>')
+
+    path = os.path.join(out_dir, 'index.html')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(
+            '<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"><title>COVID-19 hospitalizations report</title></head>\n<body>\n'
+            f'<h1>COVID-19 hospitalizations report</h1>\n<p>{html.escape(config)}</p>\n'
+            + '\n'.join(sections) + '\n</body>\n</html>\n'
+        )
+    return path
+
+
+def export(regions=None, selected_date=None, date_range=None, formats=('html',), out_dir=EXPORT_DIR, workers=None,
+           tables=None, geojson_dir=GEOJSON_DIR, scale=2):
+    """
+    Render every chart of the configuration to out_dir and write its index.html.
+
+    Args:
+        regions (list): region names, all regions when None.
+        selected_date (datetime.date): KPI / death-rate date, the latest date (of date_range) when None.
+        date_range (tuple): optional (start, end) period of the time series.
+        formats (tuple): some of render.FORMATS; svg and png need vl-convert.
+        workers (int): render process pool size (default: CPU count, 1 renders in-process).
+        tables (dict): prepared tables, load_tables() when None.
+    Returns:
+        dict with the index path, the chart paths and the build / render timings.
+    """
+    render.check_formats(formats)
+    start = time.perf_counter()
+    tables = tables if tables is not None else load_tables()
+    df = tables["full"]
+    all_regions = sorted(r for r in df["region_name"].dropna().unique() if r)
+    unknown = sorted(set(regions or []) - set(all_regions))
+    if unknown:
+        raise ValueError(f"Unknown regions {unknown}")
+    regions = [r for r in all_regions if r in regions] if regions else all_regions
+    if selected_date is None:
+        last_day = df["jour"].max() if date_range is None else min(pd.Timestamp(date_range[1]), df["jour"].max())
+        selected_date = last_day.date()
+    loaded = time.perf_counter()
+
+    chart_specs = specs(tables, regions, selected_date, date_range, local_geojson(geojson_dir))
+    built = time.perf_counter()
+
+    paths = render.render_all(chart_specs, out_dir, formats, workers, scale)
+    period = f", {date_range[0]} to {date_range[1]}" if date_range else ""
+    config = f"{len(regions)} regions ({', '.join(regions)}), date {selected_date}{period}"
+    index = write_index(out_dir, chart_specs, paths, config)
+    rendered = time.perf_counter()
+
+    return {
+        'index': index,
+        'charts': paths,
+        'load_s': loaded - start,
+        'build_s': built - loaded,
+        'render_s': rendered - built,
+        'total_s': rendered - start,
+    }
+
+
+def _date(text):
+    return pd.Timestamp(text).date()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export every dashboard chart for one configuration.")
+    parser.add_argument("--regions", default="all", help="comma-separated region names, or 'all'")
+    parser.add_argument("--date", type=_date, default=None, help="selected date (default: latest)")
+    parser.add_argument("--start", type=_date, default=None, help="first day of the period (with --end)")
+    parser.add_argument("--end", type=_date, default=None, help="last day of the period (with --start)")
+    parser.add_argument("--formats", default="html", help=f"comma-separated, some of {','.join(render.FORMATS)}")
+    parser.add_argument("--out", default=EXPORT_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--scale", type=float, default=2, help="PNG scale factor")
+    args = parser.parse_args(argv)
+
+    if (args.start is None) != (args.end is None):
+        parser.error("--start and --end go together")
+    regions = None if args.regions == "all" else [r.strip() for r in args.regions.split(",")]
+    date_range = (args.start, args.end) if args.start else None
+    formats = tuple(f.strip() for f in args.formats.split(","))
+    try:
+        result = export(regions, args.date, date_range, formats, args.out, args.workers, scale=args.scale)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"{len(result['charts'])} charts exported to {result['index']} in {result['total_s']:.1f}s "
+          f"(load {result['load_s']:.1f}s, build {result['build_s']:.1f}s, render {result['render_s']:.1f}s, {render.backend()})")
+    if render.backend() == "cdn" and "html" in formats:
+        print("vl-convert is not installed: HTML pages load Vega from a CDN (pip install vl-convert-python for offline pages)")
+    url = viz.GEOJSON["region"][0]
+    if url not in local_geojson():
+        print(f"Map boundaries are loaded from {url}: copy {os.path.basename(url)} to {GEOJSON_DIR} to inline them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# short-horizon forecasts for every region and indicator, fitted as NumPy batches
+import numpy as np
+import pandas as pd
+
+from core.cache import bounded_cache
+
+FORECAST_INDICATORS = ['tx_indic_7J_hosp', 'tx_indic_7J_SC', 'tx_indic_7J_DC']
+
+# Smoothing parameters tried for every series; the best one-step SSE wins
+ALPHAS = (0.2, 0.4, 0.6, 0.8)
+BETAS = (0.05, 0.15, 0.3)
+
+# Trend damping, so forecasts flatten out instead of extrapolating a wave forever
+PHI = 0.9
+
+# Two-sided 95% normal quantile for the prediction intervals
+Z_95 = 1.96
+
+
+def series_matrix(df, key='region_name', indicators=FORECAST_INDICATORS):
+    """
+    Pivot long data into an (n_series, n_days) matrix on a continuous daily index.
+
+    Returns:
+        (matrix, labels, dates): labels[i] is the (entity, indicator) of row i,
+        missing days are NaN.
+    """
+    dates = pd.date_range(df['jour'].min(), df['jour'].max(), freq='D')
+    wide = df.pivot_table(index='jour', columns=key, values=list(indicators), aggfunc='mean')
+    wide = wide.reindex(dates)
+    labels = [(entity, indicator) for indicator, entity in wide.columns]
+    return wide.to_numpy(dtype=float).T, labels, dates
+
+
+def holt_batch(Y, alpha, beta, phi=PHI):
+    """
+    Damped Holt linear smoothing of every row of Y at once.
+    The loop runs over time only; each step updates all series with NumPy.
+
+    Args:
+        Y (np.ndarray): (n_series, n_days) observations, NaN for missing days.
+        alpha, beta (np.ndarray): per-series smoothing parameters, shape (n_series,).
+    Returns:
+        (level, trend, sse, n_obs): final states and one-step squared-error sums.
+    """
+    n_series, n_days = Y.shape
+    # Start from the first observed value of each series
+    first = np.argmax(~np.isnan(Y), axis=1)
+    level = Y[np.arange(n_series), first]
+    level = np.where(np.isnan(level), 0.0, level)
+    trend = np.zeros(n_series)
+    sse = np.zeros(n_series)
+    n_obs = np.zeros(n_series)
+
+    for t in range(1, n_days):
+        y = Y[:, t]
+        predicted = level + phi * trend
+        observed = ~np.isnan(y) & (t > first)
+        error = np.where(observed, y - predicted, 0.0)
+        sse += error ** 2
+        n_obs += observed
+
+        # Missing days keep the predicted state
+        new_level = predicted + alpha * error
+        trend = np.where(observed, beta * (new_level - level) + (1 - beta) * phi * trend, phi * trend)
+        level = new_level
+    return level, trend, sse, n_obs
+
+
+def fit_forecast(Y, horizon=14, phi=PHI):
+    """
+    Fit every series for every (alpha, beta) candidate in one batch, keep the
+    best candidate per series and forecast `horizon` days ahead.
+
+    Returns:
+        (mean, lower, upper): (n_series, horizon) arrays, clipped at 0 (rates).
+    """
+    n_series = Y.shape[0]
+    grid = [(a, b) for a in ALPHAS for b in BETAS]
+    # Candidates are stacked along the series axis: (n_candidates * n_series, n_days)
+    Y_all = np.tile(Y, (len(grid), 1))
+    alpha = np.repeat([a for a, _ in grid], n_series)
+    beta = np.repeat([b for _, b in grid], n_series)
+    level, trend, sse, n_obs = holt_batch(Y_all, alpha, beta, phi)
+
+    mse = (sse / np.maximum(n_obs, 1)).reshape(len(grid), n_series)
+    best = np.argmin(mse, axis=0)
+    pick = best * n_series + np.arange(n_series)
+    level, trend = level[pick], trend[pick]
+    sigma = np.sqrt(mse[best, np.arange(n_series)])
+
+    steps = np.arange(1, horizon + 1)
+    damping = np.cumsum(phi ** steps)
+    mean = level[:, None] + trend[:, None] * damping[None, :]
+    spread = Z_95 * sigma[:, None] * np.sqrt(steps)[None, :]
+    return np.clip(mean, 0, None), np.clip(mean - spread, 0, None), mean + spread
+
+
+@bounded_cache(max_bytes=16 * 1024 ** 2, max_entries=16)
+def forecast_table(df, key='region_name', horizon=14, indicators=tuple(FORECAST_INDICATORS)):
+    """
+    Forecast every entity and indicator of df `horizon` days past its last date.
+    Cached per data fingerprint, so the fit only runs once per dataset and level.
+
+    Returns:
+        DataFrame with columns key, indicator, jour, forecast, lower, upper.
+    """
+    indicators = [i for i in indicators if i in df.columns]
+    Y, labels, dates = series_matrix(df, key, indicators)
+    mean, lower, upper = fit_forecast(Y, horizon)
+
+    future = pd.date_range(dates[-1] + pd.Timedelta(days=1), periods=horizon, freq='D')
+    n_series = len(labels)
+    return pd.DataFrame({
+        key: np.repeat([entity for entity, _ in labels], horizon),
+        'indicator': np.repeat([indicator for _, indicator in labels], horizon),
+        'jour': np.tile(future, n_series),
+        'forecast': mean.ravel(),
+        'lower': lower.ravel(),
+        'upper': upper.ravel(),
+    })
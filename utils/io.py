@@ -1,18 +1,30 @@
 # load_data(), fetch_and_cache(), license text
 import streamlit as st
 import pandas as pd
+from core.io import DATA_PATH, DEP_DATA_PATH, ROW_LIMIT, read_data, read_department_data
 
-def load_data(nrows=65180, path='data/covid-hosp-txad-reg-2023-06-30-16h29.csv'):
+def load_data(nrows=ROW_LIMIT, path=None):
     """
     Load hospital COVID data from the specified CSV file.
     - nrows: number of rows to read (None for all)
-    - path: path to the CSV file
+    - path: path to the CSV file (defaults to DATA_PATH)
     Returns: pandas DataFrame with lowercased columns and parsed dates in 'jour'.
     """
     try:
-        df = pd.read_csv(path, nrows=nrows, sep=';')
-        return df 
+        return read_data(nrows, path)
     except Exception as e:
         st.error(f"Failed to load data: {e}")
         return pd.DataFrame()
-    
+
+def load_department_data(nrows=None, path=None):
+    """
+    Load the optional department-level file (same indicators, 'dep' instead of 'reg').
+    - nrows: number of rows to read (None for all)
+    - path: path to the CSV file (defaults to DEP_DATA_PATH)
+    Returns: pandas DataFrame, empty when the file is not available.
+    """
+    try:
+        return read_department_data(nrows, path)
+    except Exception as e:
+        st.warning(f"Failed to load department data: {e}")
+        return pd.DataFrame()
@@ -1,14 +1,76 @@
 # cleaning, normalization, feature engineerin
 import streamlit as st
 import pandas as pd 
-
-@st.cache_data
-def get_filtered_data(df, regions, selected_date):
-    filtered_df = df[df['region_name'].isin(regions)].copy()
+from core.cache import bounded_cache
+from core import query
+from core.perf import timed
+# The data logic lives in core.prep; re-exported so pages keep importing from utils.prep
+from core.prep import (
+    AGE_CLASSES, DEPARTMENTS, INDICATORS, LEVELS, REGION_NAMES,
+    cleaning, department_feature_engineering, exploration, feature_engineering,
+    level_view, make_rollups, make_tables, validate_data,
+)
+
+# Bounded LRU instead of an unbounded @st.cache_data: every (regions, date)
+# combination used to keep its own copy of the filtered frames forever
+@timed("get_filtered_data")
+@bounded_cache(max_bytes=64 * 1024 ** 2, max_entries=256)
+def get_filtered_data(df, regions, selected_date, key='region_name'):
+    """
+    Filter df on the selected entities (regions by default, or any level's
+    name column given as key) and return (filtered_df, rows of selected_date).
+    """
+    # Only the columns the pages use are read (and kept in the cache)
+    columns = ['jour', key, 'region_name', *INDICATORS, 'hosp_growth_rate']
+    filtered_df = query.select(df, columns=list(dict.fromkeys(columns)), filters=[(key, 'in', list(regions))])
     filtered_df['jour'] = pd.to_datetime(filtered_df['jour'])
     date_filtered_df = filtered_df[filtered_df['jour'].dt.date == selected_date]
 
     if date_filtered_df.empty:
+        # fallback to latest available per entity
+        latest_data = filtered_df.loc[filtered_df.groupby(key)['jour'].idxmax()]
+    else:
+        latest_data = date_filtered_df
+
+    return filtered_df, latest_data
+
+@timed("get_kpis")
+@bounded_cache(max_bytes=8 * 1024 ** 2, max_entries=64)
+def get_kpis(kpis, level, entities, selected_date):
+    """
+    Return the rows of the precomputed KPI table (tables["kpis"], see
+    core.artifacts.entity_kpis) of the selected entities of level on
+    selected_date, or on their latest earlier day.
+    """
+    rows = query.select(kpis, filters=[('level', '==', level), ('entity', 'in', list(entities)), ('jour', '<=', selected_date)])
+    if rows.empty:
+        return rows
+    return rows.loc[rows.groupby('entity')['jour'].idxmax()]
+
+@timed("get_age_data")
+@bounded_cache(max_bytes=64 * 1024 ** 2, max_entries=64)
+def get_age_data(store_path, store_version, regions, age, selected_date, date_range=None):
+    """
+    Read the rows of one age class for the selected regions (and optional
+    (start, end) date range) from the partitioned age store, and return
+    (filtered_df, rows of selected_date) like get_filtered_data().
+    Only the partitions whose statistics match the filters are read.
+    store_version is core.store.version(store_path): it keys the cache on
+    the content of the store, not only on its path.
+    """
+    filters = [('region_name', 'in', list(regions)), ('cl_age90', '==', age)]
+    if date_range is not None:
+        filters.append(('jour', 'between', list(date_range)))
+    columns = ['jour', 'region_name', 'cl_age90', *INDICATORS]
+    filtered_df = query.select(store_path, columns=columns, filters=filters, order_by=['region_name', 'jour'])
+    filtered_df['jour'] = pd.to_datetime(filtered_df['jour'])
+
+    # Same weekly growth rate as feature_engineering(), on the selected series only
+    growth = filtered_df.groupby('region_name')['tx_indic_7J_hosp'].pct_change(periods=7)
+    filtered_df['hosp_growth_rate'] = growth.replace([float('inf'), -float('inf')], float('nan'))
+
+    date_filtered_df = filtered_df[filtered_df['jour'].dt.date == selected_date]
+    if date_filtered_df.empty and not filtered_df.empty:
         # fallback to latest available per region
         latest_data = filtered_df.loc[filtered_df.groupby('region_name')['jour'].idxmax()]
     else:
@@ -32,115 +94,16 @@ def show_data_quality(df):
     else:
         st.success("No duplicate rows.")
 
-def cleaning(df):
-    """
-    Clean the DataFrame by removing duplicates and missing values.
-    """
-    print('Missing values remaining:', df.isnull().sum().sum())
-    print('Duplicate rows remaining:', df.duplicated().sum())
-    # Remove duplicates
-    df = df.drop_duplicates()
-    
-    # Remove rows with missing values
-    df = df.dropna()
-    
-    # Convert date column to datetime format
-    df['jour'] = pd.to_datetime(df['jour'], format='%Y-%m-%d')
-    
-    # Verify no missing values and no duplicates remain
-    print('Missing values remaining:', df.isnull().sum().sum())
-    print('Duplicate rows remaining:', df.duplicated().sum())
-    return df
-
-def validate_data(df):
-    # Check numeric columns
-    assert df['tx_indic_7J_hosp'].min() >= 0, "Hospitalization column has negative numbers!"
-
-    # Check date column
-    assert df['jour'].notnull().all(), "Missing dates found!"
-
-    # Check categories
-    valid_categories = ['A', 'B', 'C']
-    if 'category' in df.columns:
-        if not df['category'].isin(valid_categories).all():
-            st.warning("Unknown categories found in data")
-    
-    return df
-
-
-def exploration(df):
-	print(df.info())
-	print(df.describe())
-
-#no normalization needed for this dataset 
-#because rates are already standardized (per 100,000 inhabitants)
-
-def feature_engineering(df):
-    # create a new column to add region names to the region codes
-    
-    region_names = {
-        1 : 'Guadeloupe',
-        2: 'Martinique',
-        3: 'Guyane',
-        4: 'La Réunion',
-        6: 'Mayotte',
-        11: 'Île-de-France',
-        24: 'Centre-Val de Loire',
-        27: 'Bourgogne-Franche-Comté',
-        28: 'Normandie',
-        32: 'Hauts-de-France',
-        44: 'Grand Est',
-        52: 'Pays de la Loire',
-        53: 'Bretagne',
-        75: 'Nouvelle-Aquitaine',
-        76: 'Occitanie',
-        84: 'Auvergne-Rhône-Alpes',
-        93: 'Provence-Alpes-Côte d\'Azur',
-        94: 'Corse'
-    }
-    # Ensure region codes are int for mapping
-    df['reg'] = df['reg'].astype(int)
-    df['region_name'] = df['reg'].map(region_names)
-
-    # Create a new column to calculate the growth rate of hospitalizations per week
-    # Use groupby to avoid cross-region calculation if needed
-    # Ensure 'jour' is a datetime column
-    df['jour'] = pd.to_datetime(df['jour'])
-
-    # Sort the DataFrame by region and date (important for accurate pct_change)
-    df = df.sort_values(['reg', 'jour'])
-
-    # Calculate the weekly growth rate of hospitalization rate (7-day difference)
-    df['hosp_growth_rate'] = df.groupby('reg')['tx_indic_7J_hosp'].pct_change(periods=7)
-
-    # Replace infinite values with NA (occurs when previous value is zero)
-    df['hosp_growth_rate'] = df['hosp_growth_rate'].replace([float('inf'), -float('inf')], pd.NA)
-
-
-    return df
-
-def make_tables(df):
+def show_validation_report(report):
     """
-    Prepare cleaned DataFrame and aggregated tables for the dashboard:
-    - full: cleaned & feature-engineered df
-    - timeseries: hospitalization per day
-    - by_region: hospitalization per region
+    Display the per-rule violation counts of a ValidationReport and sample
+    rows of every failed rule.
     """
-    # Step 1: Clean and feature engineer
-    df_clean = cleaning(df)
-    df_feature = feature_engineering(df_clean)
-    df_validate = validate_data(df_feature)
-
-    # Timeseries table
-    timeseries = df_validate.groupby('jour')['tx_indic_7J_hosp'].sum().reset_index()
-
-    # By region table
-    by_region = df_validate.groupby('region_name')['tx_indic_7J_hosp'].sum().reset_index()
-
-    # Return dictionary
-    return {
-        "full": df_validate,
-        "timeseries": timeseries,
-        "by_region": by_region
-    }
-
+    for line in report.describe():
+        st.warning(f"⚠️ {line}")
+    if not report.describe():
+        st.success(f"All validation rules pass on {report.rows} rows.")
+    st.dataframe(report.summary, hide_index=True)
+    for rule, rows in report.samples.items():
+        with st.expander(f"Sample rows violating {rule}"):
+            st.dataframe(rows)
@@ -0,0 +1,196 @@
+# incremental rolling statistics and surge alerts per region and indicator
+import copy
+
+import numpy as np
+import pandas as pd
+
+from core.cache import bounded_cache
+from utils.forecast import FORECAST_INDICATORS, series_matrix
+
+# Events below this z-score are not kept; the Alerts page filters on its own k >= this
+ALERT_FLOOR = 2.0
+
+
+class RollingStats:
+    """
+    Running rolling statistics of many daily series, updated in O(1) per
+    series and per day: ring buffers hold the last `window` values and the
+    last `z_window` weekly growth rates, with running sums and sums of squares.
+
+    Each new day computes the weekly growth rate (value vs `window` days
+    earlier) and its z-score against the previous `z_window` growth rates;
+    surges above ALERT_FLOOR sigma on series above `min_rate` are recorded.
+    """
+
+    def __init__(self, labels, window=7, z_window=28, min_rate=1.0, max_alerts=5000):
+        self.labels = list(labels)
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        self.window = window
+        self.z_window = z_window
+        self.min_rate = min_rate
+        self.max_alerts = max_alerts
+        n = len(self.labels)
+
+        # Rolling window of values
+        self.values = np.zeros((n, window))
+        self.pos = np.zeros(n, dtype=int)
+        self.count = np.zeros(n, dtype=int)
+        self.sum = np.zeros(n)
+        self.sumsq = np.zeros(n)
+
+        # Rolling window of weekly growth rates
+        self.growth = np.zeros((n, z_window))
+        self.g_pos = np.zeros(n, dtype=int)
+        self.g_count = np.zeros(n, dtype=int)
+        self.g_sum = np.zeros(n)
+        self.g_sumsq = np.zeros(n)
+
+        self.last_value = np.full(n, np.nan)
+        self.last_growth = np.full(n, np.nan)
+        self.last_z = np.full(n, np.nan)
+        self.last_day = None
+        self.alerts = []
+
+    # --- statistics ---
+
+    @property
+    def mean(self):
+        return np.where(self.count > 0, self.sum / np.maximum(self.count, 1), np.nan)
+
+    @property
+    def variance(self):
+        n = np.maximum(self.count, 1)
+        return np.where(self.count > 1, np.maximum(self.sumsq / n - (self.sum / n) ** 2, 0), np.nan)
+
+    def _growth_stats(self):
+        n = np.maximum(self.g_count, 1)
+        mean = self.g_sum / n
+        std = np.sqrt(np.maximum(self.g_sumsq / n - mean ** 2, 0))
+        return mean, std
+
+    # --- updates ---
+
+    def update(self, day, values):
+        """
+        Ingest one day of values (array aligned on labels, NaN = no data).
+        Only observed series are touched; each costs O(1).
+        """
+        values = np.asarray(values, dtype=float)
+        rows = np.flatnonzero(~np.isnan(values))
+        x = values[rows]
+
+        # Value leaving the window is the one from `window` days ago
+        full = self.count[rows] >= self.window
+        oldest = self.values[rows, self.pos[rows]]
+        self.sum[rows] += x - np.where(full, oldest, 0.0)
+        self.sumsq[rows] += x ** 2 - np.where(full, oldest ** 2, 0.0)
+        self.values[rows, self.pos[rows]] = x
+        self.pos[rows] = (self.pos[rows] + 1) % self.window
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.window)
+
+        # Weekly growth rate, only when last week's value is known and non-zero
+        with np.errstate(divide='ignore', invalid='ignore'):
+            growth = np.where(full & (oldest > 0), x / oldest - 1, np.nan)
+        self.last_value[rows] = x
+        self.last_growth[rows] = growth
+
+        # z-score against the previous growth rates (before adding today's)
+        g_mean, g_std = self._growth_stats()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = np.where(
+                (self.g_count[rows] >= self.z_window // 2) & (g_std[rows] > 0),
+                (growth - g_mean[rows]) / g_std[rows],
+                np.nan
+            )
+        self.last_z[rows] = z
+
+        surging = (z >= ALERT_FLOOR) & (x >= self.min_rate)
+        for i in np.flatnonzero(surging):
+            entity, indicator = self.labels[rows[i]]
+            self.alerts.append((day, entity, indicator, x[i], growth[i], z[i]))
+        if len(self.alerts) > self.max_alerts:
+            del self.alerts[:len(self.alerts) - self.max_alerts]
+
+        # Push today's growth rate into the z window
+        has_growth = ~np.isnan(growth)
+        g_rows, g = rows[has_growth], growth[has_growth]
+        g_full = self.g_count[g_rows] >= self.z_window
+        g_oldest = self.growth[g_rows, self.g_pos[g_rows]]
+        self.g_sum[g_rows] += g - np.where(g_full, g_oldest, 0.0)
+        self.g_sumsq[g_rows] += g ** 2 - np.where(g_full, g_oldest ** 2, 0.0)
+        self.growth[g_rows, self.g_pos[g_rows]] = g
+        self.g_pos[g_rows] = (self.g_pos[g_rows] + 1) % self.z_window
+        self.g_count[g_rows] = np.minimum(self.g_count[g_rows] + 1, self.z_window)
+
+        self.last_day = day
+
+    def update_frame(self, df_day, key='region_name'):
+        """
+        Ingest the rows of new days (long format, like tables["full"]), one day at a time.
+        Days already ingested are skipped, so the whole frame can be passed again.
+        """
+        if self.last_day is not None:
+            df_day = df_day[df_day['jour'] > self.last_day]
+        indicators = sorted({indicator for _, indicator in self.labels if indicator in df_day.columns})
+        for day, rows in df_day.groupby('jour', sort=True):
+            values = np.full(len(self.labels), np.nan)
+            for indicator in indicators:
+                for entity, value in zip(rows[key], rows[indicator]):
+                    i = self.index.get((entity, indicator))
+                    if i is not None:
+                        values[i] = value
+            self.update(day, values)
+
+    @classmethod
+    def from_frame(cls, df, key='region_name', indicators=FORECAST_INDICATORS, **kwargs):
+        """Build the state by replaying the history of df once, day by day."""
+        indicators = [i for i in indicators if i in df.columns]
+        X, labels, dates = series_matrix(df, key, indicators)
+        state = cls(labels, **kwargs)
+        for t, day in enumerate(dates):
+            state.update(day, X[:, t])
+        return state
+
+    # --- views ---
+
+    def snapshot(self, key='region_name'):
+        """Current value, rolling mean / std, growth rate and z-score of every series."""
+        return pd.DataFrame({
+            key: [entity for entity, _ in self.labels],
+            'indicator': [indicator for _, indicator in self.labels],
+            'value': self.last_value,
+            'rolling_mean': self.mean,
+            'rolling_std': np.sqrt(self.variance),
+            'weekly_growth': self.last_growth,
+            'z_score': self.last_z,
+        })
+
+    def alerts_frame(self, key='region_name'):
+        """Recorded surges, most recent first."""
+        columns = ['jour', key, 'indicator', 'value', 'weekly_growth', 'z_score']
+        return pd.DataFrame(self.alerts, columns=columns).sort_values('jour', ascending=False, ignore_index=True)
+
+
+def advance(state, df, key='region_name', indicators=FORECAST_INDICATORS):
+    """
+    Return the RollingStats of df from the state of a previous version of the
+    data: a copy of state fed only the days after its last day, so sessions
+    still reading state are not affected. The history is replayed instead
+    when there is no state or df has series that state does not track.
+    """
+    indicators = [i for i in indicators if i in df.columns]
+    labels = {(entity, indicator) for entity in df[key].dropna().unique() for indicator in indicators}
+    if state is None or not labels <= state.index.keys():
+        return RollingStats.from_frame(df, key, indicators)
+    state = copy.deepcopy(state)
+    state.update_frame(df, key)
+    return state
+
+
+@bounded_cache(max_bytes=32 * 1024 ** 2, max_entries=8)
+def rolling_stats(df, key='region_name'):
+    """
+    Return the RollingStats of df, built once per data fingerprint, for
+    tables without the state kept by the app (tables["rolling"], see advance()).
+    """
+    return RollingStats.from_frame(df, key)
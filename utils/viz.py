@@ -1,30 +1,104 @@
 import altair as alt
 import pandas as pd
-from scipy.signal import find_peaks
+from core.cache import bounded_cache
+from core.perf import timed
+from core import query
+from core.waves import detect_waves
+
+# Charts are cached per (data fingerprint, arguments), so every session and the
+# startup warm-up share them; a chart is measured with the frames it embeds
+# (data, layers, lookups), which the byte budget bounds
+chart_cache = bounded_cache(max_bytes=32 * 1024 ** 2, max_entries=32)
+
+# GeoJSON boundaries and matching name column for each map level
+GEOJSON = {
+    "region": ('https://raw.githubusercontent.com/gregoiredavid/france-geojson/master/regions.geojson', 'region_name'),
+    "department": ('https://raw.githubusercontent.com/gregoiredavid/france-geojson/master/departements.geojson', 'dep_name'),
+}
+
+# Axis / legend title of each name column
+KEY_TITLES = {'region_name': 'Region', 'dep_name': 'Department'}
+
+# Period of the published exports, shown on the maps of the whole history
+FULL_PERIOD = '03/2020 - 06/2023'
+
+
+def period_title(period=None):
+    """Title suffix of a (start, end) period, FULL_PERIOD when None."""
+    if period is None:
+        return FULL_PERIOD
+    start, end = (pd.Timestamp(d) for d in period)
+    return f"{start.strftime('%d/%m/%Y')} - {end.strftime('%d/%m/%Y')}"
+
+# Display name of each indicator
+INDICATOR_NAMES = {
+    "tx_indic_7J_hosp": "Hospitalizations",
+    "tx_indic_7J_SC": "Critical care",
+    "tx_indic_7J_DC": "Deaths"
+}
+
+def _forecast_layers(df_forecast, color):
+    """
+    Build the dashed forecast line and its 95% interval band.
+    Args:
+        df_forecast (pd.DataFrame): rows of forecast_table() to draw.
+        color (alt.Color): color encoding shared with the observed lines.
+    """
+    band = alt.Chart(df_forecast).mark_area(opacity=0.15).encode(
+        x='jour:T',
+        y='lower:Q',
+        y2='upper:Q',
+        color=color
+    )
+    line = alt.Chart(df_forecast).mark_line(strokeDash=[4, 3]).encode(
+        x='jour:T',
+        y='forecast:Q',
+        color=color,
+        tooltip=[
+            alt.Tooltip('jour:T', title='Date'),
+            alt.Tooltip('forecast:Q', title='Forecast', format='.2f'),
+            alt.Tooltip('lower:Q', title='Lower 95%', format='.2f'),
+            alt.Tooltip('upper:Q', title='Upper 95%', format='.2f')
+        ]
+    )
+    return [band, line]
 
-def line_chart(df, regions, title):
+@timed("viz.line_chart")
+@chart_cache
+def line_chart(df, regions, title, key='region_name', forecast=None):
     """
     Generate a line chart showing hospitalization trends for selected regions.
     
     Args:
         df (pd.DataFrame): The input DataFrame containing the data.
-        regions (list): A list of region names to display on the chart.
+        regions (list): A list of region (or department) names to display on the chart.
         title (str): The title of the chart.
+        key (str): The name column of the level, 'region_name' or 'dep_name'.
+        forecast (pd.DataFrame): optional forecast_table() output to overlay.
     """
     #Filter the DataFrame to include only the selected regions
-    df_filtered = df[df['region_name'].isin(regions)]
+    df_filtered = query.select(df, columns=['jour', key, 'tx_indic_7J_hosp'], filters=[(key, 'in', list(regions))])
+    key_title = KEY_TITLES.get(key, key)
 
     #Create the Altair chart
+    color = alt.Color(f'{key}:N', title=key_title)
     chart = alt.Chart(df_filtered).mark_line().encode(
         x=alt.X('jour:T', title='Date'),
         y=alt.Y('tx_indic_7J_hosp:Q', title='New Hospitalization Rate (7d)'),
-        color=alt.Color('region_name:N', title='Region'),
+        color=color,
         tooltip=[
             alt.Tooltip('jour:T', title='Date'),
-            alt.Tooltip('region_name:N', title='Region'),
+            alt.Tooltip(f'{key}:N', title=key_title),
             alt.Tooltip('tx_indic_7J_hosp:Q', title='Hospitalization Rate (7d)')
         ]
-    ).properties(
+    )
+
+    # Overlay the forecast of the selected regions
+    if forecast is not None:
+        df_forecast = forecast[forecast[key].isin(regions) & (forecast['indicator'] == 'tx_indic_7J_hosp')]
+        chart = alt.layer(chart, *_forecast_layers(df_forecast, color))
+
+    chart = chart.properties(
         title=title,
         width=800,
         height=500
@@ -32,12 +106,15 @@ def line_chart(df, regions, title):
 
     return chart
 
-def bar_chart_death(df, selected_date):
+@timed("viz.bar_chart_death")
+@chart_cache
+def bar_chart_death(df, selected_date, key='region_name'):
     """
     Static death rate bar chart filtered by selected regions and selected date.
     Args:
         df (pd.DataFrame): The input DataFrame containing the data.
         selected_date: selected date from the slidebar 
+        key (str): The name column of the level, 'region_name' or 'dep_name'.
     """
     import altair as alt
     import pandas as pd
@@ -50,17 +127,18 @@ def bar_chart_death(df, selected_date):
 
     # Handle no data case
     if df_filtered.empty:
-        return alt.Chart(pd.DataFrame({'region_name': [], 'tx_indic_7J_DC': []})).mark_bar()
+        return alt.Chart(pd.DataFrame({key: [], 'tx_indic_7J_DC': []})).mark_bar()
 
+    key_title = KEY_TITLES.get(key, key)
     bars = (
-        alt.Chart(df_filtered)
+        alt.Chart(df_filtered[[key, 'jour', 'tx_indic_7J_DC']])
         .mark_bar()
         .encode(
-            x=alt.X('region_name:N', title='Region', sort='-y'),
+            x=alt.X(f'{key}:N', title=key_title, sort='-y'),
             y=alt.Y('tx_indic_7J_DC:Q', title='Death Rate (7-day avg)'),
             color=alt.Color('tx_indic_7J_DC:Q', scale=alt.Scale(scheme='reds'), title='Death Rate'),
             tooltip=[
-                alt.Tooltip('region_name:N', title='Region'),
+                alt.Tooltip(f'{key}:N', title=key_title),
                 alt.Tooltip('tx_indic_7J_DC:Q', title='Death Rate', format='.2f'),
                 alt.Tooltip('jour:T', title='Date')
             ]
@@ -68,7 +146,7 @@ def bar_chart_death(df, selected_date):
         .properties(
             width=700,
             height=400,
-            title=f"Death Rate by Selected Regions on {selected_date.strftime('%d %b %Y')}"
+            title=f"Death Rate by Selected {key_title}s on {selected_date.strftime('%d %b %Y')}"
         )
     )
 
@@ -76,6 +154,8 @@ def bar_chart_death(df, selected_date):
 
 
 
+@timed("viz.ranked_bar_chart")
+@chart_cache
 def ranked_bar_chart(df):
     """
     Generate an interactive ranked bar chart of regions by mean hospitalization rate,
@@ -155,19 +235,24 @@ def ranked_bar_chart(df):
 
     return chart
 
-def map_chart(df): 
+@timed("viz.map_chart")
+@chart_cache
+def map_chart(df, level='region', period=None): 
     """ Generate a map chart visualizing hospitalization rates geographically. 
-    Args: df (pd.DataFrame): The input DataFrame containing the data. """ 
+    Args: df (pd.DataFrame): The input DataFrame containing the data, daily rows or the
+          precomputed per-entity means of tables["rollups"][level] (much cheaper).
+          level (str): 'region' or 'department'.
+          period (tuple): (start, end) dates df covers, for the title (whole history when None). """ 
 
-    # URL to a GeoJSON file with French region boundaries 
-    url_regions = 'https://raw.githubusercontent.com/gregoiredavid/france-geojson/master/regions.geojson' 
+    # URL to a GeoJSON file with French region (or department) boundaries 
+    url_regions, key = GEOJSON[level]
     
     # Load the GeoJSON data 
     regions_geo = alt.Data(url=url_regions, format=alt.DataFormat(property='features')) 
     
     # Calculate the mean hospitalization rate per region 
     # We use the mean to have a single value for each region on the map
-    mean_hospitalization_rate_by_region = df.groupby('region_name')['tx_indic_7J_hosp'].mean().reset_index()
+    mean_hospitalization_rate_by_region = df.groupby(key)['tx_indic_7J_hosp'].mean().reset_index()
     
     # Create the map chart
     chart = alt.Chart(regions_geo).mark_geoshape(
@@ -175,14 +260,14 @@ def map_chart(df):
     ).encode(
         color=alt.Color('tx_indic_7J_hosp:Q', title='Mean Hospitalization Rate', scale=alt.Scale(scheme='reds')),
         tooltip=[
-            alt.Tooltip('properties.nom:N', title='Region'),
+            alt.Tooltip('properties.nom:N', title=KEY_TITLES[key]),
             alt.Tooltip('tx_indic_7J_hosp:Q', title='Mean Rate', format='.2f')
         ]
     ).transform_lookup(
         lookup='properties.nom',
-        from_=alt.LookupData(data=mean_hospitalization_rate_by_region, key='region_name', fields=['tx_indic_7J_hosp'])
+        from_=alt.LookupData(data=mean_hospitalization_rate_by_region, key=key, fields=['tx_indic_7J_hosp'])
     ).properties(
-        title='Mean Hospitalization Rate by Region 03/2020 - 06/2023'
+        title=f'Mean Hospitalization Rate by {KEY_TITLES[key]} {period_title(period)}'
     ).project(
         type='mercator'
     ).properties(
@@ -192,19 +277,24 @@ def map_chart(df):
 
     return chart
 
-def map_chart2(df): 
+@timed("viz.map_chart2")
+@chart_cache
+def map_chart2(df, level='region', period=None): 
     """ Generate a map chart visualizing death rates geographically. 
-    Args: df (pd.DataFrame): The input DataFrame containing the data. """ 
+    Args: df (pd.DataFrame): The input DataFrame containing the data, daily rows or the
+          precomputed per-entity means of tables["rollups"][level] (much cheaper).
+          level (str): 'region' or 'department'.
+          period (tuple): (start, end) dates df covers, for the title (whole history when None). """ 
 
-    # URL to a GeoJSON file with French region boundaries 
-    url_regions = 'https://raw.githubusercontent.com/gregoiredavid/france-geojson/master/regions.geojson' 
+    # URL to a GeoJSON file with French region (or department) boundaries 
+    url_regions, key = GEOJSON[level]
     
     # Load the GeoJSON data 
     regions_geo = alt.Data(url=url_regions, format=alt.DataFormat(property='features')) 
     
     # Calculate the mean hospitalization rate per region 
     # We use the mean to have a single value for each region on the map
-    mean_hospitalization_rate_by_region = df.groupby('region_name')['tx_indic_7J_DC'].mean().reset_index()
+    mean_hospitalization_rate_by_region = df.groupby(key)['tx_indic_7J_DC'].mean().reset_index()
     
     # Create the map chart
     chart = alt.Chart(regions_geo).mark_geoshape(
@@ -212,14 +302,14 @@ def map_chart2(df):
     ).encode(
         color=alt.Color('tx_indic_7J_DC:Q', title='Mean Death Rate', scale=alt.Scale(scheme='reds')),
         tooltip=[
-            alt.Tooltip('properties.nom:N', title='Region'),
+            alt.Tooltip('properties.nom:N', title=KEY_TITLES[key]),
             alt.Tooltip('tx_indic_7J_DC:Q', title='Mean Rate', format='.2f')
         ]
     ).transform_lookup(
         lookup='properties.nom',
-        from_=alt.LookupData(data=mean_hospitalization_rate_by_region, key='region_name', fields=['tx_indic_7J_DC'])
+        from_=alt.LookupData(data=mean_hospitalization_rate_by_region, key=key, fields=['tx_indic_7J_DC'])
     ).properties(
-        title='Mean Death Rate by Region 03/2020 - 06/2023'
+        title=f'Mean Death Rate by {KEY_TITLES[key]} {period_title(period)}'
     ).project(
         type='mercator'
     ).properties(
@@ -229,7 +319,9 @@ def map_chart2(df):
 
     return chart
 
-def combo_chart(df, region):
+@timed("viz.combo_chart")
+@chart_cache
+def combo_chart(df, region, forecast=None):
     """
     Generate a combined line chart showing hospitalization and critical care rates 
     over time for a single region.
@@ -237,11 +329,16 @@ def combo_chart(df, region):
     Args:
         df (pd.DataFrame): The input DataFrame containing the data.
         region (str): The name of the region to display.
+        forecast (pd.DataFrame): optional forecast_table() output to overlay.
     """
     import altair as alt
 
     # Filter the DataFrame for the selected region
-    df_region = df[df['region_name'] == region]
+    df_region = query.select(
+        df,
+        columns=['jour', 'region_name', 'tx_indic_7J_hosp', 'tx_indic_7J_SC'],
+        filters=[('region_name', '==', region)]
+    )
 
     # Define a mapping from column names to display names
     indicator_mapping = {
@@ -256,6 +353,7 @@ def combo_chart(df, region):
     )
 
     # Create the combo chart
+    color = alt.Color("Indicator:N", scale=color_scale, title="Indicator")
     chart = (
         alt.Chart(df_region)
         .transform_fold(
@@ -273,10 +371,21 @@ def combo_chart(df, region):
         .encode(
             x=alt.X("jour:T", title="Date"),
             y=alt.Y("Value:Q", title="Rate (per 100k)"),
-            color=alt.Color("Indicator:N", scale=color_scale, title="Indicator"),
+            color=color,
             tooltip=["jour:T", "Indicator:N", alt.Tooltip("Value:Q", format=".2f")]
         )
-        .properties(
+    )
+
+    # Overlay the forecast of both indicators, named like the folded lines
+    if forecast is not None:
+        df_forecast = forecast[
+            (forecast['region_name'] == region) & forecast['indicator'].isin(indicator_mapping.keys())
+        ].copy()
+        df_forecast['Indicator'] = df_forecast['indicator'].map(indicator_mapping)
+        chart = alt.layer(chart, *_forecast_layers(df_forecast, color))
+
+    chart = (
+        chart.properties(
             title=f"Evolution of Hospitalizations vs Critical Care — {region}",
             width=700,
             height=400
@@ -286,33 +395,21 @@ def combo_chart(df, region):
 
     return chart
 
-def waves(df):
+@timed("viz.waves")
+@bounded_cache(max_bytes=16 * 1024 ** 2, max_entries=4)
+def waves(df, detected=None):
     """
     Computes a smoothed national hospitalization rate, detects peaks and waves, produces a table of peaks, 
     and plots the chart.    
     Args:
-        df (pd.DataFrame): The input DataFrame containing the data."""
-
-    # Aggregate daily hospitalization rates to national mean
-    df_national = df.groupby('jour')['tx_indic_7J_hosp'].mean().reset_index()
-    df_national.rename(columns={'tx_indic_7J_hosp': 'tx_moyen_national_hosp_7j'}, inplace=True)
-    df_national = df_national.sort_values(by='jour')
-
-    # Smooth the national mean series using rolling window
-    df_national['tx_lisse'] = df_national['tx_moyen_national_hosp_7j'].rolling(window=7, center=True, min_periods=1).mean()
+        df (pd.DataFrame): The input DataFrame containing the data.
+        detected (dict): optional precomputed detect_waves() output of df, tables["waves"]
+                         of the artifacts ('national', 'waves' and 'peaks'), skips the detection."""
 
-    # Detect peaks corresponding to epidemic waves
-    peaks, _ = find_peaks(df_national['tx_lisse'], prominence=0.5, distance=60)
-
-    # Create a table of detected waves
-    df_waves = df_national.iloc[peaks][['jour', 'tx_lisse']].copy()
-    df_waves.rename(columns={'jour': 'Date_of_peak', 'tx_lisse': 'Value_of_peak_Smoothed_Average_Rate'}, inplace=True)
-    df_waves['Waves'] = [f"Wave {i+1}" for i in range(len(df_waves))]
-    df_waves['Date_of_peak'] = pd.to_datetime(df_waves['Date_of_peak'])
-    
-    # Prepare peaks DataFrame for plotting
-    df_peaks = df_national.iloc[peaks].copy()
-    df_peaks['Waves'] = [f"Wave {i+1}" for i in range(len(peaks))]
+    if detected is not None:
+        df_national, df_waves, df_peaks = detected['national'], detected['waves'], detected['peaks']
+    else:
+        df_national, df_waves, df_peaks = detect_waves(df)
 
     # Altair plot 
     base = alt.Chart(df_national).encode(
@@ -368,6 +465,8 @@ def waves(df):
 
     return df_waves, chart
 
+@timed("viz.death_rate_during_peaks")
+@chart_cache
 def death_rate_during_peaks(df):
     """
     Generate a line chart showing the variation of death rates during peak hospitalization periods using the peaks table from the waves function.   
@@ -416,6 +515,8 @@ def death_rate_during_peaks(df):
 
     return chart
 
+@timed("viz.hospitalization_growth_rate_chart")
+@chart_cache
 def hospitalization_growth_rate_chart(df, regions):
     """
     Generate a line chart showing the hospitalization growth rate trends for selected regions,
@@ -426,7 +527,11 @@ def hospitalization_growth_rate_chart(df, regions):
         regions (list): A list of region names to display on the chart.
     """
     # Filter the DataFrame to include only the selected regions
-    df_filtered = df[df['region_name'].isin(regions)]
+    df_filtered = query.select(
+        df,
+        columns=['jour', 'region_name', 'hosp_growth_rate'],
+        filters=[('region_name', 'in', list(regions))]
+    )
 
     # Base line chart for growth rates
     growth_line = alt.Chart(df_filtered).mark_line().encode(
@@ -457,3 +562,71 @@ def hospitalization_growth_rate_chart(df, regions):
     ).interactive()
 
     return chart
+
+@timed("viz.lag_heatmap")
+@chart_cache
+def lag_heatmap(df_lags, label_a, label_b, key='region_name'):
+    """
+    Generate a heatmap of the lead/lag between regions for a pair of indicators.
+    Args:
+        df_lags (pd.DataFrame): output of correlation.lead_lag_table().
+        label_a (str): display name of the indicator of the rows.
+        label_b (str): display name of the indicator of the columns.
+        key (str): The name column of the level, 'region_name' or 'dep_name'.
+    """
+    key_title = KEY_TITLES.get(key, key)
+    max_lag = max(int(df_lags['best_lag'].abs().max()), 1)
+
+    chart = alt.Chart(df_lags).mark_rect().encode(
+        x=alt.X(f'{key}_b:N', title=f'{label_b} — {key_title}'),
+        y=alt.Y(f'{key}_a:N', title=f'{label_a} — {key_title}'),
+        color=alt.Color(
+            'best_lag:Q',
+            title='Lag (days)',
+            scale=alt.Scale(scheme='redblue', domain=[-max_lag, max_lag])
+        ),
+        opacity=alt.Opacity('peak_corr:Q', title='Correlation', scale=alt.Scale(domain=[0, 1])),
+        tooltip=[
+            alt.Tooltip(f'{key}_a:N', title=f'{label_a} in'),
+            alt.Tooltip(f'{key}_b:N', title=f'{label_b} in'),
+            alt.Tooltip('best_lag:Q', title='Lag (days)'),
+            alt.Tooltip('peak_corr:Q', title='Correlation', format='.2f')
+        ]
+    ).properties(
+        title=f'Lead/lag of {label_a} vs {label_b} between regions',
+        width=700,
+        height=600
+    )
+
+    return chart
+
+@timed("viz.alerts_chart")
+def alerts_chart(df_alerts, key='region_name'):
+    """
+    Generate a timeline of surge alerts: one point per alert, sized by its z-score.
+    Args:
+        df_alerts (pd.DataFrame): output of RollingStats.alerts_frame(), with an 'indicator_name' column.
+        key (str): The name column of the level, 'region_name' or 'dep_name'.
+    """
+    key_title = KEY_TITLES.get(key, key)
+
+    chart = alt.Chart(df_alerts).mark_circle(opacity=0.7).encode(
+        x=alt.X('jour:T', title='Date'),
+        y=alt.Y(f'{key}:N', title=key_title),
+        color=alt.Color('indicator_name:N', title='Indicator'),
+        size=alt.Size('z_score:Q', title='z-score'),
+        tooltip=[
+            alt.Tooltip('jour:T', title='Date'),
+            alt.Tooltip(f'{key}:N', title=key_title),
+            alt.Tooltip('indicator_name:N', title='Indicator'),
+            alt.Tooltip('value:Q', title='Rate', format='.2f'),
+            alt.Tooltip('weekly_growth:Q', title='Weekly growth', format='.0%'),
+            alt.Tooltip('z_score:Q', title='z-score', format='.1f')
+        ]
+    ).properties(
+        title='Surge alerts over time',
+        width=800,
+        height=400
+    ).interactive()
+
+    return chart
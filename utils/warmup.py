@@ -0,0 +1,110 @@
+# background warm-up of the caches behind the default views
+import logging
+import threading
+import time
+
+from utils.correlation import lag_correlations, lead_lag_table
+from utils.prep import get_filtered_data, get_kpis
+from utils import viz
+
+logger = logging.getLogger(__name__)
+
+# Regions preselected in the sidebar
+DEFAULT_REGIONS = ['Grand Est', 'Île-de-France', 'Bretagne']
+
+
+def default_regions(all_regions):
+    """Default multiselect value, in the order of all_regions (part of the cache keys)."""
+    return [region for region in all_regions if region in DEFAULT_REGIONS]
+
+
+def default_state(tables):
+    """(regions, selected_date) of a new session: default regions and the latest date."""
+    df = tables["full"]
+    all_regions = sorted([r for r in df["region_name"].unique() if r])
+    return default_regions(all_regions), df["jour"].max().date()
+
+
+def steps(tables):
+    """
+    Yield (name, call) for every cached computation of the default Overview
+    and Deep Dive pages, with the same arguments as the pages.
+    """
+    df = tables["full"]
+    regions, selected_date = default_state(tables)
+    key = "region_name"
+
+    # Overview
+    yield "overview.get_filtered_data", lambda: get_filtered_data(df, regions, selected_date, key=key)
+    filtered_df, _ = get_filtered_data(df, regions, selected_date, key=key)
+    if tables.get("kpis") is not None:
+        yield "overview.get_kpis", lambda: get_kpis(tables["kpis"], "region", regions, selected_date)
+    yield "overview.line_chart", lambda: viz.line_chart(
+        filtered_df, regions, title="New Hospitalizations by Region Over Time", key=key, forecast=None
+    )
+    yield "overview.map_chart", lambda: viz.map_chart(tables["rollups"]["region"], level="region")
+    yield "overview.map_chart2", lambda: viz.map_chart2(tables["rollups"]["region"], level="region")
+    yield "overview.bar_chart_death", lambda: viz.bar_chart_death(filtered_df, selected_date, key=key)
+
+    # Regional Deep Dive (its get_filtered_data call is the Overview's)
+    yield "deep_dives.ranked_bar_chart", lambda: viz.ranked_bar_chart(df)
+    region = sorted(df["region_name"].dropna().unique())[0]
+    yield "deep_dives.combo_chart", lambda: viz.combo_chart(df, region, forecast=None)
+    yield "deep_dives.waves", lambda: viz.waves(df, tables.get("waves"))
+    yield "deep_dives.lag_heatmap", lambda: viz.lag_heatmap(
+        lead_lag_table(lag_correlations(df), "tx_indic_7J_DC", "tx_indic_7J_hosp"),
+        viz.INDICATOR_NAMES["tx_indic_7J_DC"], viz.INDICATOR_NAMES["tx_indic_7J_hosp"]
+    )
+    yield "deep_dives.death_rate_during_peaks", lambda: viz.death_rate_during_peaks(df)
+    yield "deep_dives.hospitalization_growth_rate_chart", lambda: viz.hospitalization_growth_rate_chart(filtered_df, regions)
+
+
+class Warmup:
+    """
+    Status of one warm-up run: per-step timings, total duration and the
+    first error, if any. `done` is set when the run finishes.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.timings = {}
+        self.error = None
+        self.started_at = None
+        self.duration_s = None
+
+    def run(self, tables):
+        self.started_at = time.time()
+        start = time.perf_counter()
+        try:
+            for name, call in steps(tables):
+                step_start = time.perf_counter()
+                call()
+                self.timings[name] = time.perf_counter() - step_start
+        except Exception as e:  # a failed warm-up only leaves the caches cold
+            self.error = f"{type(e).__name__}: {e}"
+        self.duration_s = time.perf_counter() - start
+        self.done.set()
+        if self.error:
+            logger.warning("Warm-up failed after %.2fs (%d steps): %s", self.duration_s, len(self.timings), self.error)
+        else:
+            logger.info("Warm-up finished in %.2fs (%d steps)", self.duration_s, len(self.timings))
+        return self
+
+    def start(self, tables):
+        threading.Thread(target=self.run, args=(tables,), name="warmup", daemon=True).start()
+        return self
+
+
+_latest = None
+
+
+def start(tables):
+    """Warm the default views of tables in a background thread; returns the Warmup status."""
+    global _latest
+    _latest = Warmup().start(tables)
+    return _latest
+
+
+def wait(timeout=None):
+    """Block until the last warm-up started by start() finishes (for benchmarks and tests)."""
+    return _latest is None or _latest.done.wait(timeout)